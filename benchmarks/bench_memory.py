@@ -0,0 +1,71 @@
+"""
+Memory used by planner/Drive file records.
+
+Compares the legacy dict-per-file records (string keys, full path strings,
+hex MD5s) with FileRecord, for a synthetic Drive listing.
+
+    PYTHONPATH=src python benchmarks/bench_memory.py --files 500000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import treegen  # noqa: E402
+from gdsync.core.drive import FOLDER_MIME, _parse_mtime, build_drive_paths  # noqa: E402
+
+
+def legacy_records(raw):
+    """
+    The pre-FileRecord shape: one dict per file with its full path.
+    """
+    records = []
+    for f, rec in zip(
+        (f for f in raw if f.get("mimeType") != FOLDER_MIME),
+        build_drive_paths(raw),
+    ):
+        records.append(
+            {
+                "id": f["id"],
+                "path": str(rec.path),
+                "md5": f.get("md5Checksum"),
+                "size": int(f.get("size", 0)),
+                "mtime": _parse_mtime(f.get("modifiedTime")),
+            }
+        )
+    return records
+
+
+def measure(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100_000)
+    args = parser.parse_args()
+
+    raw = treegen.raw_listing(treegen.tree(args.files))
+
+    legacy, legacy_bytes = measure(legacy_records, raw)
+    del legacy
+    compact, compact_bytes = measure(build_drive_paths, raw)
+
+    mb = 1024 * 1024
+    print(f"files:          {len(compact)}")
+    print(f"dict records:   {legacy_bytes / mb:8.1f} MB")
+    print(f"FileRecord:     {compact_bytes / mb:8.1f} MB")
+    print(f"reduction:      {1 - compact_bytes / legacy_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Offline throughput benchmarks for scan, list, plan and transfer.
+
+Each scenario runs in a fresh process against a synthetic tree and the
+in-memory fake Drive, and reports wall time, throughput and peak RSS.
+
+    PYTHONPATH=src python benchmarks/bench_sync.py
+    PYTHONPATH=src python benchmarks/bench_sync.py scan plan --files 100000 --depth 6
+    PYTHONPATH=src python benchmarks/bench_sync.py scan --files 1000000 --depth 5
+    PYTHONPATH=src python benchmarks/bench_sync.py list --files 1000000 --latency 0.05
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import treegen  # noqa: E402
+from fake_drive import FakeDrive  # noqa: E402
+
+
+SCENARIOS = {}
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__.replace("bench_", "")] = fn
+    return fn
+
+
+def _project(tmp: Path, scope: str = "full_drive", folder_id=None) -> Path:
+    (tmp / ".gdsync").mkdir(parents=True)
+    (tmp / ".gdsync" / "config.json").write_text(
+        json.dumps({"sync_scope": scope, "drive_folder_id": folder_id})
+    )
+    os.chdir(tmp)
+    return tmp
+
+
+# -------------------------------------------------
+# Scenarios
+# -------------------------------------------------
+
+@scenario
+def bench_scan(args, tmp: Path):
+    from gdsync.core.planner import SCAN_WORKERS, _scan_local_files
+
+    files = treegen.tree(
+        args.files, depth=args.depth, fanout=args.fanout, sizes=args.sizes
+    )
+    treegen.write_local(tmp, files)
+    total = sum(size for _, size in files)
+    workers = args.scan_workers or SCAN_WORKERS
+
+    def scan(index, scan_workers):
+        t0 = time.perf_counter()
+        _scan_local_files(
+            tmp,
+            index,
+            hash_workers=args.hash_workers,
+            scan_workers=scan_workers,
+        )
+        return time.perf_counter() - t0
+
+    index = {}
+    cold = scan(index, workers)
+    serial = scan(index, 1)
+    parallel = scan(index, workers)
+
+    return [
+        ("scan (cold)", len(files), total, cold, {}),
+        ("scan (indexed, 1 thread)", len(files), 0, serial, {}),
+        (f"scan (indexed, {workers} threads)", len(files), 0, parallel, {}),
+    ]
+
+
+@scenario
+def bench_list(args, tmp: Path):
+    from gdsync.core.drive import (
+        build_drive_paths,
+        list_all_drive_files,
+        list_drive_tree,
+    )
+
+    files = treegen.tree(
+        args.files, depth=args.depth, fanout=args.fanout, sizes=args.sizes
+    )
+    drive = FakeDrive(args.latency).load(treegen.raw_listing(files))
+
+    t0 = time.perf_counter()
+    raw = list_all_drive_files(drive)
+    paths = build_drive_paths(raw)
+    full = time.perf_counter() - t0
+    full_calls = dict(drive.calls)
+
+    drive.calls.clear()
+    t0 = time.perf_counter()
+    tree_files, _ = list_drive_tree(drive, "root", service_factory=lambda: drive)
+    bfs = time.perf_counter() - t0
+
+    return [
+        ("list (full drive)", len(paths), 0, full, full_calls),
+        ("list (folder BFS)", len(tree_files), 0, bfs, dict(drive.calls)),
+    ]
+
+
+@scenario
+def bench_plan(args, tmp: Path):
+    from gdsync.core.planner import plan_sync
+
+    files = treegen.tree(
+        args.files, depth=args.depth, fanout=args.fanout, sizes=args.sizes
+    )
+    # Half the tree exists on both sides, a quarter on each side only
+    half, quarter = len(files) // 2, len(files) // 4
+    local = files[:half + quarter]
+    remote = files[:half] + files[half + quarter:]
+
+    rows = []
+
+    # Folder scope: level-parallel BFS listing of the project folder
+    project = _project(tmp / "folder", scope="folder", folder_id="root")
+    treegen.write_local(project, local)
+    drive = FakeDrive(args.latency).load(treegen.raw_listing(remote))
+    opts = {"service_factory": lambda: drive, "hash_workers": args.hash_workers}
+
+    t0 = time.perf_counter()
+    plan = plan_sync(drive, project, **opts)
+    cold = time.perf_counter() - t0
+    n = sum(len(plan[k]) for k in plan if k != "folders")
+    rows.append(("plan folder (cold)", n, 0, cold, dict(drive.calls)))
+
+    drive.calls.clear()
+    t0 = time.perf_counter()
+    plan_sync(drive, project, **opts)
+    rows.append(
+        ("plan folder (indexed)", n, 0, time.perf_counter() - t0,
+         dict(drive.calls))
+    )
+
+    # Full drive scoped to one top-level folder (--download-dir): only
+    # that subtree is resolved, listed and scanned
+    project = _project(tmp / "scoped", scope="full_drive")
+    treegen.write_local(project / "Drive", local)
+    drive = FakeDrive(args.latency).load(treegen.raw_listing(remote))
+    subtree = files[0][0].split("/")[0]
+
+    t0 = time.perf_counter()
+    plan = plan_sync(drive, project, download_dir=subtree, **opts)
+    rows.append((
+        f"plan full (--download-dir {subtree})",
+        sum(len(plan[k]) for k in plan if k != "folders"),
+        0,
+        time.perf_counter() - t0,
+        dict(drive.calls),
+    ))
+
+    # Full drive: flat listing, then the changes feed on the second run
+    project = _project(tmp / "full", scope="full_drive")
+    treegen.write_local(project / "Drive", local)
+    drive = FakeDrive(args.latency).load(treegen.raw_listing(remote))
+
+    t0 = time.perf_counter()
+    plan_sync(drive, project, full_relist=True, **opts)
+    rows.append(("plan full (cold)", n, 0, time.perf_counter() - t0,
+                 dict(drive.calls)))
+
+    drive.calls.clear()
+    t0 = time.perf_counter()
+    plan_sync(drive, project, **opts)
+    rows.append(
+        ("plan full (indexed, incremental)", n, 0, time.perf_counter() - t0,
+         dict(drive.calls))
+    )
+    return rows
+
+
+@scenario
+def bench_transfer(args, tmp: Path):
+    from gdsync.core.executor import download_files, upload_files
+
+    _project(tmp)
+    files = treegen.tree(
+        min(args.files, args.transfer_files),
+        depth=args.depth,
+        fanout=args.fanout,
+        sizes=args.sizes,
+    )
+    raw = treegen.raw_listing(files, real_md5=True)
+    contents = {
+        f["id"]: treegen.content(path, size)
+        for f, (path, size) in zip(
+            (f for f in raw if "md5Checksum" in f), files
+        )
+    }
+    drive = FakeDrive(args.latency).load(raw, contents)
+    total = sum(size for _, size in files)
+
+    from gdsync.core.drive import build_drive_paths
+    from gdsync.core.folders import FolderCache
+
+    records = build_drive_paths(raw)
+    opts = {"workers": args.transfer_workers, "service_factory": lambda: drive}
+
+    t0 = time.perf_counter()
+    download_files(drive, records, tmp, **opts)
+    down = time.perf_counter() - t0
+    down_calls = dict(drive.calls)
+
+    rows = [("download", len(records), total, down, down_calls)]
+
+    try:
+        import googleapiclient.http  # noqa: F401
+    except ImportError as e:
+        print(f"  upload: skipped ({e})")
+        return rows
+
+    drive.calls.clear()
+    t0 = time.perf_counter()
+    upload_files(drive, records, tmp, folders=FolderCache(), **opts)
+    up = time.perf_counter() - t0
+
+    rows.append(("upload", len(records), total, up, dict(drive.calls)))
+    return rows
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+
+def _child(name, args, queue):
+    from gdsync.core import api
+
+    api.configure(args.max_qps)
+
+    # Always report back, so a failing scenario cannot block the parent
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                rows = SCENARIOS[name](args, Path(tmp))
+            finally:
+                os.chdir("/")
+    except Exception as e:
+        print(f"  {name}: failed ({type(e).__name__}: {e})", file=sys.stderr)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((rows, peak_kb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        metavar="SCENARIO",
+        help=f"Any of: {', '.join(SCENARIOS)} (default: all)",
+    )
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument(
+        "--sizes", choices=list(treegen.SIZE_PROFILES), default="tiny"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds of simulated latency per Drive request",
+    )
+    parser.add_argument(
+        "--max-qps",
+        type=float,
+        default=1e9,
+        help="Request rate ceiling (default: effectively unlimited)",
+    )
+    parser.add_argument("--hash-workers", type=int, default=None)
+    parser.add_argument(
+        "--scan-workers",
+        type=int,
+        default=None,
+        help="Directory listing threads (default: planner.SCAN_WORKERS)",
+    )
+    parser.add_argument("--transfer-workers", type=int, default=4)
+    parser.add_argument(
+        "--transfer-files",
+        type=int,
+        default=2_000,
+        help="Cap on files moved by the transfer scenario",
+    )
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    ctx = multiprocessing.get_context("fork")
+    mb = 1024 * 1024
+
+    print(
+        f"{'scenario':<30} {'files':>9} {'seconds':>9} {'files/s':>10} "
+        f"{'MB/s':>8} {'peak RSS':>10}  API calls"
+    )
+
+    for name in args.scenarios or SCENARIOS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_child, args=(name, args, queue))
+        proc.start()
+        rows, peak_kb = queue.get()
+        proc.join()
+
+        for label, n, nbytes, seconds, calls in rows:
+            seconds = max(seconds, 1e-9)
+            print(
+                f"{label:<30} {n:>9} {seconds:>9.3f} {n / seconds:>10.0f} "
+                f"{nbytes / mb / seconds:>8.1f} {peak_kb / 1024:>8.1f}MB  "
+                f"{sum(calls.values()) if calls else '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+In-memory stand-in for the googleapiclient Drive v3 service.
+
+Implements the parts of service.files() / service.changes() that gdsync
+uses (list with pagination and `in parents` queries, get_media, create,
+update, copy), the batch endpoint, and a fake HTTP transport for media
+downloads, with a configurable per-request latency.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from gdsync.core.drive import FOLDER_MIME
+
+
+_PARENT_RE = re.compile(r"'([^']+)' in parents")
+_NAME_RE = re.compile(r"name='((?:[^'\\]|\\.)*)'")
+
+
+class FakeResponse(dict):
+    def __init__(self, status: int, headers: dict):
+        super().__init__(headers)
+        self.status = status
+
+
+class FakeProgress:
+    def __init__(self, done: int, total: int):
+        self.resumable_progress = done
+        self.total_size = total
+
+    def progress(self) -> float:
+        return self.resumable_progress / self.total_size if self.total_size else 1.0
+
+
+class FakeRequest:
+    def __init__(self, drive, method: str, fn):
+        self.drive = drive
+        self.method = method
+        self._fn = fn
+
+    def execute(self, num_retries=0):
+        self.drive.wait(self.method)
+        return self._fn()
+
+    def _execute_in_batch(self):
+        self.drive.count(self.method)
+        return self._fn()
+
+
+class FakeMediaRequest:
+    """
+    What files().get_media() returns: enough for MediaIoBaseDownload.
+    """
+
+    def __init__(self, drive, file_id: str):
+        self.drive = drive
+        self.uri = f"fake://media/{file_id}"
+        self.headers = {}
+        self.http = FakeHttp(drive)
+
+    def execute(self, num_retries=0):
+        self.drive.wait("files.get_media")
+        return self.drive.content[self.uri.rsplit("/", 1)[1]]
+
+
+class FakeHttp:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        self.drive.wait("media.get")
+        data = self.drive.content[uri.rsplit("/", 1)[1]]
+        start, end = 0, len(data) - 1
+
+        rng = (headers or {}).get("range") or (headers or {}).get("Range")
+        if rng:
+            a, b = rng.split("=", 1)[1].split("-")
+            start, end = int(a), min(int(b), len(data) - 1)
+
+        body = data[start:end + 1]
+        return (
+            FakeResponse(
+                206 if rng else 200,
+                {
+                    "content-range": f"bytes {start}-{end}/{len(data)}",
+                    "content-length": str(len(body)),
+                },
+            ),
+            body,
+        )
+
+
+class FakeUploadRequest:
+    """
+    What files().create/update(media_body=...) returns.
+    """
+
+    def __init__(self, drive, media, finish):
+        self.drive = drive
+        self.media = media
+        self.resumable_progress = 0
+        self.resumable_uri = None
+        self._finish = finish
+        self._buffer = bytearray()
+
+    def next_chunk(self, num_retries=0):
+        self.drive.wait("media.upload")
+        size = self.media.size()
+        chunk = self.media.getbytes(
+            self.resumable_progress,
+            self.media.chunksize() if self.media.chunksize() > 0 else size,
+        )
+        self._buffer += chunk
+        self.resumable_progress += len(chunk)
+
+        if self.resumable_progress >= size:
+            return None, self._finish(bytes(self._buffer))
+        return FakeProgress(self.resumable_progress, size), None
+
+    def execute(self, num_retries=0):
+        response = None
+        while response is None:
+            _, response = self.next_chunk()
+        return response
+
+
+class FakeBatch:
+    def __init__(self, drive, callback):
+        self.drive = drive
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self):
+        self.drive.wait("batch")
+        for request_id, request, callback in self.requests:
+            try:
+                response = request._execute_in_batch()
+            except Exception as e:
+                callback(request_id, None, e)
+            else:
+                callback(request_id, response, None)
+
+
+class FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q="", fields=None, pageToken=None, pageSize=100, **kwargs):
+        return FakeRequest(
+            self.drive,
+            "files.list",
+            lambda: self.drive.list(q, pageToken, min(pageSize or 100, 1000)),
+        )
+
+    def get_media(self, fileId, **kwargs):
+        return FakeMediaRequest(self.drive, fileId)
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        if media_body is not None:
+            return FakeUploadRequest(
+                self.drive,
+                media_body,
+                lambda data: self.drive.add(body, data),
+            )
+        return FakeRequest(
+            self.drive, "files.create", lambda: self.drive.add(body, None)
+        )
+
+    def update(self, fileId, body=None, media_body=None, fields=None, **kwargs):
+        if media_body is not None:
+            return FakeUploadRequest(
+                self.drive,
+                media_body,
+                lambda data: self.drive.update(fileId, body, data),
+            )
+        return FakeRequest(
+            self.drive,
+            "files.update",
+            lambda: self.drive.update(fileId, body, None),
+        )
+
+    def copy(self, fileId, body=None, fields=None, **kwargs):
+        def do_copy():
+            src = self.drive.files_by_id[fileId]
+            meta = {**src, **(body or {})}
+            meta.pop("id")
+            return self.drive.add(meta, self.drive.content.get(fileId))
+
+        return FakeRequest(self.drive, "files.copy", do_copy)
+
+
+class FakeChanges:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        return FakeRequest(
+            self.drive,
+            "changes.getStartPageToken",
+            lambda: {"startPageToken": str(len(self.drive.log))},
+        )
+
+    def list(self, pageToken, pageSize=100, **kwargs):
+        return FakeRequest(
+            self.drive,
+            "changes.list",
+            lambda: self.drive.changes_since(int(pageToken), pageSize),
+        )
+
+
+class FakeDrive:
+    """
+    The fake service. Thread-safe, so one instance can stand in for every
+    per-worker client (pass `lambda: drive` as the service factory).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.files_by_id = {}
+        self.children = defaultdict(list)
+        self.content = {}
+        self.log = []
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    # service surface
+
+    def files(self):
+        return FakeFiles(self)
+
+    def changes(self):
+        return FakeChanges(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    # bookkeeping
+
+    def count(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+
+    def wait(self, method: str):
+        self.count(method)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def load(self, raw_files, contents=None):
+        """
+        Bulk-load raw listing entries (see treegen.raw_listing).
+        """
+        for f in raw_files:
+            self.files_by_id[f["id"]] = f
+            for parent in f.get("parents", []):
+                self.children[parent].append(f["id"])
+        if contents:
+            self.content.update(contents)
+        return self
+
+    # operations
+
+    def add(self, body: dict, data: bytes | None) -> dict:
+        with self._lock:
+            self._next_id += 1
+            f = {
+                "id": f"new{self._next_id}",
+                "mimeType": "application/octet-stream",
+                "modifiedTime": "2024-01-01T00:00:00.000Z",
+                **(body or {}),
+            }
+            f.setdefault("parents", ["root"])
+            if data is not None:
+                f["size"] = str(len(data))
+                f["md5Checksum"] = hashlib.md5(data).hexdigest()
+                self.content[f["id"]] = data
+            self.files_by_id[f["id"]] = f
+            for parent in f["parents"]:
+                self.children[parent].append(f["id"])
+            self.log.append(f["id"])
+            return f
+
+    def update(self, file_id: str, body: dict | None, data: bytes | None):
+        with self._lock:
+            f = self.files_by_id[file_id]
+            f.update(body or {})
+            if data is not None:
+                f["size"] = str(len(data))
+                f["md5Checksum"] = hashlib.md5(data).hexdigest()
+                self.content[file_id] = data
+            self.log.append(file_id)
+            return f
+
+    def remove(self, file_id: str):
+        with self._lock:
+            f = self.files_by_id.pop(file_id)
+            for parent in f.get("parents", []):
+                self.children[parent].remove(file_id)
+            self.content.pop(file_id, None)
+            self.log.append(file_id)
+
+    def list(self, q: str, page_token, page_size: int) -> dict:
+        parents = _PARENT_RE.findall(q)
+        name = _NAME_RE.search(q)
+        folders_only = f"mimeType='{FOLDER_MIME}'" in q
+
+        if parents:
+            ids = [c for p in parents for c in self.children.get(p, [])]
+        else:
+            ids = list(self.files_by_id)
+
+        matches = []
+        for file_id in ids:
+            f = self.files_by_id[file_id]
+            if f.get("trashed"):
+                continue
+            if folders_only and f.get("mimeType") != FOLDER_MIME:
+                continue
+            if name and f["name"] != name.group(1).replace("\\'", "'"):
+                continue
+            matches.append(f)
+
+        start = int(page_token or 0)
+        page = matches[start:start + page_size]
+        resp = {"files": [dict(f) for f in page]}
+        if start + page_size < len(matches):
+            resp["nextPageToken"] = str(start + page_size)
+        return resp
+
+    def changes_since(self, start: int, page_size: int) -> dict:
+        changes = []
+        for i in self.log[start:start + page_size]:
+            change = {"changeType": "file", "fileId": i}
+            if i in self.files_by_id:
+                change["file"] = dict(self.files_by_id[i])
+            else:
+                change["removed"] = True
+            changes.append(change)
+
+        resp = {"changes": changes}
+        if start + page_size < len(self.log):
+            resp["nextPageToken"] = str(start + page_size)
+        else:
+            resp["newStartPageToken"] = str(len(self.log))
+        return resp
@@ -0,0 +1,130 @@
+"""
+Synthetic file trees for benchmarks.
+
+Trees are described as (relative path, size) pairs so the same shape can be
+written to disk, loaded into the fake Drive, or turned into a raw listing.
+"""
+import hashlib
+import os
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+from gdsync.core.drive import FOLDER_MIME
+
+
+# (weight, min bytes, max bytes)
+SIZE_PROFILES = {
+    "tiny": [(1.0, 0, 4 * 1024)],
+    "small": [(1.0, 1024, 256 * 1024)],
+    "mixed": [
+        (0.90, 1024, 64 * 1024),
+        (0.09, 64 * 1024, 4 * 1024 * 1024),
+        (0.01, 4 * 1024 * 1024, 64 * 1024 * 1024),
+    ],
+    "large": [(1.0, 16 * 1024 * 1024, 128 * 1024 * 1024)],
+}
+
+
+def _leaf_dir(j: int, depth: int, fanout: int) -> str:
+    parts = []
+    for _ in range(depth - 1):
+        parts.append(f"dir{j % fanout}")
+        j //= fanout
+    if depth:
+        parts.append(f"dir{j}")
+    return "/".join(reversed(parts))
+
+
+def tree(
+    n_files: int,
+    *,
+    depth: int = 3,
+    fanout: int = 10,
+    files_per_dir: int = 50,
+    sizes: str = "small",
+    seed: int = 0,
+) -> List[Tuple[str, int]]:
+    """
+    (path, size) pairs for n_files files spread over leaf directories
+    `depth` levels deep.
+    """
+    rng = random.Random(seed)
+    profile = SIZE_PROFILES[sizes]
+    weights = [w for w, _, _ in profile]
+    leaves = max(1, n_files // files_per_dir)
+
+    result = []
+    for i in range(n_files):
+        _, lo, hi = rng.choices(profile, weights)[0]
+        folder = _leaf_dir(i % leaves, depth, fanout)
+        name = f"file{i}.bin"
+        result.append((f"{folder}/{name}" if folder else name, rng.randint(lo, hi)))
+    return result
+
+
+def content(path: str, size: int) -> bytes:
+    """
+    Deterministic file content for a path.
+    """
+    seed = hashlib.md5(path.encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def write_local(root: Path, files: List[Tuple[str, int]]):
+    for path, size in files:
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content(path, size))
+
+
+def raw_listing(
+    files: List[Tuple[str, int]],
+    *,
+    real_md5: bool = False,
+) -> List[dict]:
+    """
+    Raw files().list entries (folders included) for a tree. With
+    real_md5=False the checksums are cheap stand-ins that do not match
+    content(); use real_md5=True when the files will be downloaded.
+    """
+    folder_ids = {"": "root"}
+
+    def folder_id(path: str) -> str:
+        if path not in folder_ids:
+            parent, _, name = path.rpartition("/")
+            parent_id = folder_id(parent)
+            folder_ids[path] = fid = f"d{len(folder_ids)}"
+            listing.append(
+                {
+                    "id": fid,
+                    "name": name,
+                    "mimeType": FOLDER_MIME,
+                    "parents": [parent_id],
+                }
+            )
+        return folder_ids[path]
+
+    listing: List[dict] = []
+
+    for i, (path, size) in enumerate(files):
+        parent, _, name = path.rpartition("/")
+        md5 = (
+            hashlib.md5(content(path, size)).hexdigest()
+            if real_md5
+            else hashlib.md5(os.fsencode(path)).hexdigest()
+        )
+        listing.append(
+            {
+                "id": f"f{i}",
+                "name": name,
+                "mimeType": "application/octet-stream",
+                "parents": [folder_id(parent)],
+                "md5Checksum": md5,
+                "size": str(size),
+                "modifiedTime": "2024-01-01T00:00:00.000Z",
+            }
+        )
+
+    return listing
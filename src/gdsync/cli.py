@@ -1,15 +1,67 @@
+from datetime import datetime, timezone
 import argparse
+import importlib
 import sys
 
-from gdsync.commands.init import cmd_init
-from gdsync.commands.run import cmd_run
-from gdsync.commands.status import cmd_status
-from gdsync.commands.purge import cmd_purge
-from gdsync.commands.auth import (
-    cmd_auth,
-    cmd_auth_help,
-    cmd_auth_status,
-)
+
+def _command(module: str, name: str):
+    """
+    A command handler that imports its module only when it runs, so
+    `gdsync --help` and local-only commands never load the Google client
+    libraries.
+    """
+
+    def handler(args):
+        return getattr(importlib.import_module(module), name)(args)
+
+    return handler
+
+
+def _positive_int(value: str) -> int:
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return n
+
+
+def _positive_float(value: str) -> float:
+    try:
+        n = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not n > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return n
+
+
+cmd_init = _command("gdsync.commands.init", "cmd_init")
+cmd_run = _command("gdsync.commands.run", "cmd_run")
+cmd_status = _command("gdsync.commands.status", "cmd_status")
+cmd_log = _command("gdsync.commands.log", "cmd_log")
+cmd_purge = _command("gdsync.commands.purge", "cmd_purge")
+cmd_auth = _command("gdsync.commands.auth", "cmd_auth")
+cmd_auth_help = _command("gdsync.commands.auth", "cmd_auth_help")
+cmd_auth_status = _command("gdsync.commands.auth", "cmd_auth_status")
+
+
+def _utc_time(value: str) -> str:
+    """
+    An ISO 8601 date or time, naive meaning UTC, in the conflict log's
+    timestamp format.
+    """
+    text = value.strip()
+    if text[-1:] in ("Z", "z"):
+        text = text[:-1] + "+00:00"
+    try:
+        when = datetime.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r}")
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -52,7 +104,7 @@ def build_parser() -> argparse.ArgumentParser:
     p_run.add_argument(
         "--download-dir",
         metavar="PATH",
-        help="Download only this Drive directory (full-drive mode)",
+        help="Sync only this directory (lists and scans just that subtree)",
     )
     p_run.add_argument(
         "--conflict-strategy",
@@ -60,6 +112,58 @@ def build_parser() -> argparse.ArgumentParser:
         default="ask",
         help="How to resolve conflicts (default: ask)",
     )
+    p_run.add_argument(
+        "--hash-workers",
+        type=int,
+        metavar="N",
+        help="Parallel workers for local MD5 hashing (default: CPU count)",
+    )
+    p_run.add_argument(
+        "--stream",
+        action="store_true",
+        help="Start transfers while the local scan is still running",
+    )
+    p_run.add_argument(
+        "--full-relist",
+        action="store_true",
+        help="Ignore the cached Drive listing and list everything again",
+    )
+    p_run.add_argument(
+        "--transfer-workers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Concurrent downloads/uploads (default: 4)",
+    )
+    p_run.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        metavar="MiB",
+        help="Fixed transfer chunk size in MiB (default: adapt to throughput)",
+    )
+    p_run.add_argument(
+        "--download-connections",
+        type=_positive_int,
+        default=1,
+        metavar="N",
+        help="Parallel byte ranges per large download (default: 1)",
+    )
+    p_run.add_argument(
+        "--max-qps",
+        type=_positive_float,
+        metavar="N",
+        help="Ceiling on Drive API requests per second (default: 20)",
+    )
+    p_run.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-phase timings and save a cProfile to .gdsync/",
+    )
+    p_run.add_argument(
+        "--metrics-out",
+        metavar="PATH",
+        help="Write run metrics to PATH.json and PATH.prom (Prometheus)",
+    )
     p_run.set_defaults(func=cmd_run)
 
     # -----------------
@@ -69,8 +173,51 @@ def build_parser() -> argparse.ArgumentParser:
         "status",
         help="Show sync status",
     )
+    p_status.add_argument(
+        "--remote",
+        action="store_true",
+        help="Also list Drive-side changes (needs the network)",
+    )
+    p_status.add_argument(
+        "--hash-workers",
+        type=int,
+        metavar="N",
+        help="Parallel workers for hashing changed files (default: CPU count)",
+    )
     p_status.set_defaults(func=cmd_status)
 
+    # -----------------
+    # gdsync log
+    # -----------------
+    p_log = subparsers.add_parser(
+        "log",
+        help="Show how past conflicts were resolved",
+    )
+    p_log.add_argument(
+        "path",
+        nargs="?",
+        help="Only this file, or files under this directory",
+    )
+    p_log.add_argument(
+        "--since",
+        type=_utc_time,
+        metavar="TIME",
+        help="Only conflicts at or after TIME (ISO 8601, UTC unless offset)",
+    )
+    p_log.add_argument(
+        "--until",
+        type=_utc_time,
+        metavar="TIME",
+        help="Only conflicts before TIME (e.g. 2024-05-01T12:00)",
+    )
+    p_log.add_argument(
+        "-n", "--limit",
+        type=_positive_int,
+        metavar="N",
+        help="Show only the N most recent",
+    )
+    p_log.set_defaults(func=cmd_log)
+
     # -----------------
     # gdsync purge
     # -----------------
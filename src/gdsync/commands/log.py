@@ -0,0 +1,40 @@
+from collections import deque
+from pathlib import Path
+
+from gdsync.config.project import is_initialized
+from gdsync.core.conflict_log import ConflictLog
+
+
+def _fmt_ts(ts: str) -> str:
+    return ts.replace("T", " ").rstrip("Z")
+
+
+def cmd_log(args):
+    if not is_initialized():
+        print("❌ gdsync is not initialized in this directory")
+        print("Run `gdsync init` first")
+        return 1
+
+    entries = ConflictLog(Path.cwd()).query(
+        path=getattr(args, "path", None),
+        since=getattr(args, "since", None),
+        until=getattr(args, "until", None),
+    )
+
+    # Newest last, like the log itself; only the tail is kept in memory
+    limit = getattr(args, "limit", None)
+    if limit:
+        entries = deque(entries, maxlen=limit)
+
+    shown = 0
+    for e in entries:
+        print(
+            f"{_fmt_ts(e['ts'])}  {e['strategy']:<12} "
+            f"{e['result']:<8} {e['path']}"
+        )
+        shown += 1
+
+    if not shown:
+        print("No conflicts logged.")
+
+    return 0
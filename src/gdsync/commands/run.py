@@ -1,10 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 from gdsync.config.project import is_initialized, load_config
 from gdsync.config.global_cfg import OAUTH_FILE
-from gdsync.core.auth import authenticate
-from gdsync.core.planner import plan_sync
+from gdsync.constants import DIRS_FILE, GDSYNC_DIR, PROFILE_FILE
+from gdsync.config.state import record_hashes, record_synced
+from gdsync.core import api
+from gdsync.core.auth import load_credentials, build_service
+from gdsync.core.metrics import metrics, print_summary, write_metrics
+from gdsync.core.planner import plan_sync, stream_sync
 from gdsync.core.executor import (
     download_files,
     upload_files,
@@ -13,6 +19,11 @@ from gdsync.core.executor import (
 )
 
 
+# Transfers are dispatched in batches of this many files while the
+# streaming planner is still scanning.
+STREAM_BATCH = 256
+
+
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
@@ -21,26 +32,31 @@ def _fmt_time(ts: float) -> str:
     return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def _choose_drive_dir(service) -> str | None:
+def _choose_drive_dir(service_factory) -> str | None:
     """
     Interactive Drive directory navigator.
+
+    Listings come from the cached, prefetched folder tree (core.dirtree),
+    so going back is instant and going deeper usually is too.
     """
-    from gdsync.core.drive import (
-        list_drive_directories,
-        list_drive_subdirectories,
-    )
+    from gdsync.core.dirtree import DirTree
 
+    tree = DirTree(service_factory, Path.cwd() / GDSYNC_DIR / DIRS_FILE)
+    try:
+        return _navigate(tree)
+    finally:
+        tree.close()
+
+
+def _navigate(tree) -> str | None:
     path_parts: list[str] = []
     id_stack: list[str] = ["root"]
 
     while True:
         current_id = id_stack[-1]
 
-        dirs = (
-            list_drive_directories(service)
-            if current_id == "root"
-            else list_drive_subdirectories(service, current_id)
-        )
+        dirs = tree.children(current_id)
+        tree.prefetch(d["id"] for d in dirs)
 
         current_path = "/" + "/".join(path_parts) if path_parts else "/"
         print(f"\nCurrent directory: {current_path}\n")
@@ -53,8 +69,13 @@ def _choose_drive_dir(service) -> str | None:
         for i, d in enumerate(dirs, start=1):
             print(f"  {i}) {d['name']}/")
 
+        choice = input("\nSelect a directory (r to refresh): ").strip()
+        if choice.lower() == "r":
+            tree.refresh(current_id)
+            continue
+
         try:
-            selected = dirs[int(input("\nSelect a directory: ").strip()) - 1]
+            selected = dirs[int(choice) - 1]
         except Exception:
             print("Invalid selection")
             continue
@@ -86,11 +107,192 @@ def _choose_drive_dir(service) -> str | None:
         print("Invalid choice")
 
 
+ARROWS = {
+    "downloads": "↓",
+    "pulls": "↓",
+    "uploads": "↑",
+    "pushes": "↑",
+}
+
+
+def _print_entry(arrow: str, f):
+    print(f" {arrow} {f.path} | {f.size} bytes | {_fmt_time(f.mtime)}")
+
+
+def _print_api_retries():
+    retried = {
+        endpoint: counts
+        for endpoint, counts in api.stats.summary().items()
+        if counts["retries"]
+    }
+    if not retried:
+        return
+
+    print("\nDrive API retries:")
+    for endpoint, counts in retried.items():
+        print(
+            f"  {endpoint}: {counts['retries']} of {counts['calls']} calls"
+            + (f", {counts['failures']} failed" if counts["failures"] else "")
+        )
+
+
+def _print_summary(counts: dict):
+    print("\nSummary:")
+    print(f"Uploads:   {counts['uploads']}")
+    print(f"Downloads: {counts['downloads']}")
+    print(f"Pushes:    {counts['pushes']}")
+    print(f"Pulls:     {counts['pulls']}")
+    print(f"Unchanged: {counts['unchanged']}")
+    print(f"Conflicts: {counts['conflicts']}")
+
+
+def _run_streaming(
+    service,
+    args,
+    plan_opts,
+    strategy,
+    transfer_opts,
+    download_opts,
+):
+    """
+    Plan and transfer at the same time: decisions are consumed as the
+    planner emits them, and transfers are handed to a background thread in
+    batches while the scan continues. Conflicts are held back and resolved
+    once the scan is done. Only {path: md5} of synced files is kept for
+    the new base, not their records.
+    """
+    folders, decisions = stream_sync(service, Path.cwd(), **plan_opts)
+
+    counts = dict.fromkeys(
+        ("uploads", "downloads", "pushes", "pulls", "unchanged", "conflicts"),
+        0,
+    )
+    batches = {kind: [] for kind in ARROWS}
+    conflicts = []
+    synced = {}
+    pending = []
+
+    def keep(records):
+        for record in records:
+            if record.md5 is not None:
+                synced[record.path] = record.md5_hex
+
+    print("\n🔍 Streaming sync\n")
+
+    with metrics.span("run.stream"), ThreadPoolExecutor(1) as transfers:
+        def flush(kind):
+            batch, batches[kind] = batches[kind], []
+            if not batch:
+                return
+            if kind in ("downloads", "pulls"):
+                pending.append(transfers.submit(
+                    download_files, service, batch, Path.cwd(),
+                    overwrite=kind == "pulls", **download_opts,
+                ))
+            else:
+                pending.append(transfers.submit(
+                    upload_files, service, batch, Path.cwd(),
+                    overwrite=kind == "pushes", folders=folders,
+                    **transfer_opts,
+                ))
+
+        def drain(wait=False):
+            # Fold finished batches into the base as soon as they are done
+            while pending and (wait or pending[0].done()):
+                keep(pending.pop(0).result())
+
+        # Transfers run in the background, so this is the scan's time
+        with metrics.span("plan.scan"):
+            for kind, entry in decisions:
+                counts[kind] += 1
+
+                if kind == "conflicts":
+                    conflicts.append(entry)
+                    continue
+
+                if kind == "unchanged":
+                    keep([entry])
+                    continue
+
+                if args.dry_run:
+                    _print_entry(ARROWS[kind], entry)
+                    continue
+
+                batches[kind].append(entry)
+                if len(batches[kind]) >= STREAM_BATCH:
+                    flush(kind)
+                    drain()
+
+        for kind in ARROWS:
+            flush(kind)
+        drain(wait=True)
+
+    if conflicts:
+        report_conflicts(conflicts)
+
+    _print_summary(counts)
+
+    if args.dry_run:
+        print("\n(no changes were made)")
+        return 0
+
+    if conflicts:
+        with metrics.span("run.conflicts"):
+            keep(resolve_conflicts(
+                service,
+                conflicts,
+                strategy=strategy,
+                project_root=Path.cwd(),
+                yes=args.yes,
+                folders=folders,
+            ))
+
+    record_hashes(synced)
+    _print_api_retries()
+
+    print("\n✅ Sync completed")
+    return 0
+
+
 # -------------------------------------------------
 # Command
 # -------------------------------------------------
 
 def cmd_run(args):
+    """
+    Run a sync. With --profile, print per-phase timings and counters and
+    save a cProfile of the main thread; with --metrics-out, export them as
+    JSON and as a Prometheus textfile, whether or not the run succeeds.
+    """
+    profiler = None
+    if getattr(args, "profile", False):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    status = 1
+    try:
+        with metrics.span("run"):
+            status = _run(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            print_summary()
+
+            profile_path = Path.cwd() / GDSYNC_DIR / PROFILE_FILE
+            if profile_path.parent.is_dir():
+                profiler.dump_stats(profile_path)
+                print(f"\n  cProfile: python -m pstats {profile_path}")
+
+        metrics_out = getattr(args, "metrics_out", None)
+        if metrics_out:
+            write_metrics(Path(metrics_out), status)
+
+    return status
+
+
+def _run(args):
     # -----------------------------
     # Preconditions
     # -----------------------------
@@ -104,9 +306,25 @@ def cmd_run(args):
         print("Run `gdsync auth`")
         return 1
 
-    service = authenticate()
+    api.configure(getattr(args, "max_qps", None))
+
+    with metrics.span("run.auth"):
+        creds = load_credentials()
+        service = build_service(creds)
     print("✅ Authentication OK")
 
+    chunk_mib = getattr(args, "chunk_size", None)
+
+    transfer_opts = {
+        "workers": getattr(args, "transfer_workers", 4),
+        "service_factory": partial(build_service, creds),
+        "chunk_size": chunk_mib * 1024 * 1024 if chunk_mib else None,
+    }
+    download_opts = {
+        **transfer_opts,
+        "connections": getattr(args, "download_connections", 1),
+    }
+
     # -----------------------------
     # Conflict strategy
     # -----------------------------
@@ -129,7 +347,9 @@ def cmd_run(args):
         print("  2) Choose a specific directory")
 
         if input("\n> ").strip() == "2":
-            download_dir = _choose_drive_dir(service)
+            download_dir = _choose_drive_dir(
+                transfer_opts["service_factory"]
+            )
             if not download_dir:
                 print("Aborted.")
                 return 1
@@ -137,36 +357,50 @@ def cmd_run(args):
     # -----------------------------
     # Plan
     # -----------------------------
-    plan = plan_sync(
-        service,
-        Path.cwd(),
-        download_dir=download_dir,
-    )
+    plan_opts = {
+        "download_dir": download_dir,
+        "hash_workers": getattr(args, "hash_workers", None),
+        "full_relist": getattr(args, "full_relist", False),
+        "service_factory": transfer_opts["service_factory"],
+    }
+
+    if getattr(args, "stream", False):
+        if not (args.yes or args.dry_run):
+            print("❌ --stream needs -y or --dry-run (it does not prompt)")
+            return 1
+        return _run_streaming(
+            service, args, plan_opts, strategy, transfer_opts, download_opts
+        )
+
+    with metrics.span("run.plan"):
+        plan = plan_sync(service, Path.cwd(), **plan_opts)
 
     print("\n🔍 Sync plan\n")
 
     if plan["downloads"]:
         print("Downloads:")
         for f in plan["downloads"]:
-            print(
-                f" ↓ {f['path']} | {f['size']} bytes | {_fmt_time(f['mtime'])}"
-            )
+            _print_entry("↓", f)
 
     if plan["uploads"]:
         print("\nUploads:")
         for f in plan["uploads"]:
-            print(
-                f" ↑ {f['path']} | {f['size']} bytes | {_fmt_time(f['mtime'])}"
-            )
+            _print_entry("↑", f)
+
+    if plan["pulls"]:
+        print("\nChanged on Drive:")
+        for f in plan["pulls"]:
+            _print_entry("↓", f)
+
+    if plan["pushes"]:
+        print("\nChanged locally:")
+        for f in plan["pushes"]:
+            _print_entry("↑", f)
 
     if plan["conflicts"]:
         report_conflicts(plan["conflicts"])
 
-    print("\nSummary:")
-    print(f"Uploads:   {len(plan['uploads'])}")
-    print(f"Downloads: {len(plan['downloads'])}")
-    print(f"Unchanged: {len(plan['unchanged'])}")
-    print(f"Conflicts: {len(plan['conflicts'])}")
+    _print_summary({kind: len(plan[kind]) for kind in plan if kind != "folders"})
 
     # -----------------------------
     # Dry-run
@@ -175,32 +409,68 @@ def cmd_run(args):
         print("\n(no changes were made)")
         return 0
 
+    # Files identical on both sides after this run: the next run's base
+    synced = list(plan["unchanged"])
+
     # -----------------------------
     # Downloads (safe)
     # -----------------------------
-    if plan["downloads"]:
+    if plan["downloads"] or plan["pulls"]:
         if args.yes or input("\nProceed with downloads? (y/N): ").lower() == "y":
-            download_files(service, plan["downloads"], Path.cwd())
+            with metrics.span("run.downloads"):
+                synced += download_files(
+                    service,
+                    plan["downloads"],
+                    Path.cwd(),
+                    **download_opts,
+                )
+                synced += download_files(
+                    service,
+                    plan["pulls"],
+                    Path.cwd(),
+                    overwrite=True,
+                    **download_opts,
+                )
 
     # -----------------------------
     # Conflicts (ONLY if exist)
     # -----------------------------
     if plan["conflicts"]:
-        resolve_conflicts(
-            service,
-            plan["conflicts"],
-            strategy=strategy,
-            project_root=Path.cwd(),
-            yes=args.yes,
-            dry_run=args.dry_run,
-        )
+        with metrics.span("run.conflicts"):
+            synced += resolve_conflicts(
+                service,
+                plan["conflicts"],
+                strategy=strategy,
+                project_root=Path.cwd(),
+                yes=args.yes,
+                dry_run=args.dry_run,
+                folders=plan["folders"],
+            )
 
     # -----------------------------
     # Uploads (safe)
     # -----------------------------
-    if plan["uploads"]:
+    if plan["uploads"] or plan["pushes"]:
         if args.yes or input("\nProceed with uploads? (y/N): ").lower() == "y":
-            upload_files(service, plan["uploads"], Path.cwd())
+            with metrics.span("run.uploads"):
+                synced += upload_files(
+                    service,
+                    plan["uploads"],
+                    Path.cwd(),
+                    folders=plan["folders"],
+                    **transfer_opts,
+                )
+                synced += upload_files(
+                    service,
+                    plan["pushes"],
+                    Path.cwd(),
+                    overwrite=True,
+                    folders=plan["folders"],
+                    **transfer_opts,
+                )
+
+    record_synced(synced)
+    _print_api_retries()
 
     print("\n✅ Sync completed")
-    return 0
\ No newline at end of file
+    return 0
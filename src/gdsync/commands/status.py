@@ -1,2 +1,83 @@
+from pathlib import Path
+
+from gdsync.config.project import is_initialized, load_config, sync_root
+from gdsync.config.state import load_state, save_state
+from gdsync.core.ignore import IgnoreMatcher
+from gdsync.core.status import local_changes, remote_changes
+
+
+LABELS = {
+    "added": "new",
+    "modified": "modified",
+    "deleted": "deleted",
+}
+
+
+def _print_changes(title: str, changes: dict) -> int:
+    total = sum(len(paths) for paths in changes.values())
+
+    if not total:
+        print(f"{title}: none")
+        return 0
+
+    print(f"{title}:")
+    for kind, paths in changes.items():
+        for path in paths:
+            print(f"  {LABELS[kind] + ':':<10} {path}")
+    return total
+
+
 def cmd_status(args):
-    print("gdsync status (stub)")
\ No newline at end of file
+    if not is_initialized():
+        print("❌ gdsync is not initialized in this directory")
+        print("Run `gdsync init` first")
+        return 1
+
+    config = load_config()
+    state = load_state()
+    base = state["files"]
+    ignore = IgnoreMatcher.load(Path.cwd())
+
+    print(f"Last sync: {state['last_sync'] or 'never'}\n")
+
+    changes, refreshed = local_changes(
+        sync_root(Path.cwd(), config),
+        base,
+        state["index"],
+        hash_workers=getattr(args, "hash_workers", None),
+        ignore=ignore,
+    )
+    if refreshed:
+        save_state(state)
+
+    pending = _print_changes("Local changes", changes)
+    if changes["deleted"]:
+        print(
+            "\nDeleted files are downloaded again by `gdsync run` while "
+            "they are still on Drive."
+        )
+
+    # -----------------------------
+    # Remote (only on request: needs the network)
+    # -----------------------------
+    if getattr(args, "remote", False):
+        from gdsync.core.auth import authenticate
+        from gdsync.core.planner import list_remote
+
+        drive_files, _ = list_remote(
+            authenticate(),
+            Path.cwd(),
+            config,
+            ignore=ignore,
+        )
+
+        print()
+        pending += _print_changes(
+            "Drive changes",
+            remote_changes(drive_files, base, ignore),
+        )
+
+    if pending:
+        print("\nRun `gdsync run` to sync.")
+
+    return 0
@@ -39,4 +39,15 @@ def write_config(sync_scope: str, drive_folder_id: str | None):
 def load_config() -> dict:
     path = Path.cwd() / GDSYNC_DIR / CONFIG_FILE
     with open(path) as f:
-        return json.load(f)        
\ No newline at end of file
+        return json.load(f)
+
+
+def sync_root(project_root: Path, config: dict | None = None) -> Path:
+    """
+    Local directory mirrored to Drive: Drive/ for full-drive projects,
+    the project root itself for folder projects.
+    """
+    config = config or load_config()
+    if config.get("sync_scope") == "full_drive":
+        return project_root / "Drive"
+    return project_root
@@ -1,17 +1,60 @@
-import json
+from datetime import datetime
 from pathlib import Path
 
 from gdsync.constants import GDSYNC_DIR, STATE_FILE
+from gdsync.utils.fs import read_json, write_json_atomic
+
+
+def _empty_state() -> dict:
+    return {
+        "last_sync": None,
+        "files": {},
+        "index": {},
+    }
+
+
+def state_path() -> Path:
+    return Path.cwd() / GDSYNC_DIR / STATE_FILE
 
 
 def write_empty_state():
-    path = Path.cwd() / GDSYNC_DIR / STATE_FILE
-    with open(path, "w") as f:
-        json.dump(
-            {
-                "last_sync": None,
-                "files": {},
-            },
-            f,
-            indent=2,
-        )
\ No newline at end of file
+    save_state(_empty_state())
+
+
+def load_state() -> dict:
+    """
+    Load .gdsync/state.json, falling back to an empty state.
+    """
+    state = _empty_state()
+    state.update(read_json(state_path(), {}))
+    return state
+
+
+def save_state(state: dict):
+    """
+    Atomically write .gdsync/state.json.
+    """
+    # Compact on purpose: the index can hold hundreds of thousands of entries
+    write_json_atomic(state_path(), state, separators=(",", ":"))
+
+
+def record_synced(records):
+    """
+    Record files that are now identical on both sides as the base for the
+    next three-way plan.
+    """
+    record_hashes({
+        record.path: record.md5_hex
+        for record in records
+        if record.md5 is not None
+    })
+
+
+def record_hashes(hashes: dict):
+    """
+    Like record_synced, for a {path: md5 hex} mapping.
+    """
+    state = load_state()
+    state["files"].update(hashes)
+    state["last_sync"] = datetime.utcnow().isoformat() + "Z"
+    save_state(state)
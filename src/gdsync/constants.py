@@ -4,6 +4,13 @@ GDSYNC_DIR = ".gdsync"
 
 CONFIG_FILE = "config.json"
 STATE_FILE = "state.json"
+REMOTE_FILE = "remote.json"
+UPLOADS_FILE = "uploads.json"
+PARTIAL_DIR = "partial"
 IGNORE_FILE = ".gdsyncignore"
+DIRS_FILE = "dirs.json"
+CONFLICT_LOG_FILE = "conflicts.jsonl"
+LEGACY_CONFLICT_LOG_FILE = "conflicts.json"
+PROFILE_FILE = "profile.pstats"
 
 VERSION = 1
\ No newline at end of file
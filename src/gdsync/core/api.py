@@ -0,0 +1,239 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Callable
+import http.client
+import json
+import random
+import ssl
+import threading
+import time
+
+
+# Drive's per-user quota is generous for reads but writes are throttled
+# much sooner; the limiter starts here and backs off on rate-limit errors.
+DEFAULT_QPS = 20.0
+DEFAULT_BURST = 40
+MIN_QPS = 1.0
+
+MAX_RETRIES = 8
+BASE_DELAY = 1.0
+MAX_DELAY = 64.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"userRateLimitExceeded", "rateLimitExceeded"}
+
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    ssl.SSLError,
+    http.client.HTTPException,
+)
+
+# Calls that are not safe to repeat when it is unknown whether the first
+# attempt reached Drive: a resent create leaves a duplicate file.
+NON_IDEMPOTENT = {"files.create", "files.copy"}
+
+
+# -------------------------------------------------
+# Rate limiting
+# -------------------------------------------------
+
+class TokenBucket:
+    """
+    Requests-per-second limiter shared by every worker thread.
+
+    The rate halves on each rate-limit error and creeps back up to the
+    configured ceiling with every successful call, so a long sync settles
+    at whatever rate Drive is currently willing to sustain.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.ceiling = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1):
+        n = min(n, self.burst)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._stamp) * self.rate,
+                )
+                self._stamp = now
+
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+
+                wait = (n - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def penalize(self):
+        with self._lock:
+            self.rate = max(MIN_QPS, self.rate / 2)
+
+    def reward(self):
+        if self.rate < self.ceiling:
+            with self._lock:
+                self.rate = min(self.ceiling, self.rate + self.ceiling / 100)
+
+
+# -------------------------------------------------
+# Counters
+# -------------------------------------------------
+
+class ApiStats:
+    """
+    Per-endpoint call, retry and failure counts for one process.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.retries = Counter()
+        self.failures = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, counter: Counter, endpoint: str, n: int = 1):
+        with self._lock:
+            counter[endpoint] += n
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": self.calls[endpoint],
+                    "retries": self.retries[endpoint],
+                    "failures": self.failures[endpoint],
+                }
+                for endpoint in sorted(self.calls)
+            }
+
+
+limiter = TokenBucket(DEFAULT_QPS, DEFAULT_BURST)
+stats = ApiStats()
+
+
+def configure(qps: float | None = None):
+    """
+    Set the request rate ceiling for this process.
+    """
+    global limiter
+    if qps:
+        limiter = TokenBucket(qps, max(1, int(qps * 2)))
+
+
+# -------------------------------------------------
+# Error classification
+# -------------------------------------------------
+
+def _status(exc: Exception) -> int | None:
+    resp = getattr(exc, "resp", None)
+    return getattr(resp, "status", None)
+
+
+def _reason(exc: Exception) -> str:
+    try:
+        return json.loads(exc.content)["error"]["errors"][0]["reason"]
+    except Exception:
+        return ""
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    status = _status(exc)
+    return status == 429 or (
+        status == 403 and _reason(exc) in RATE_LIMIT_REASONS
+    )
+
+
+def is_retryable(exc: Exception, idempotent: bool = True) -> bool:
+    """
+    A dropped connection or timeout may hit after Drive acted on the
+    request, so it is only retried for idempotent calls; a refused
+    connection never got that far.
+    """
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return idempotent or isinstance(exc, ConnectionRefusedError)
+    return _status(exc) in RETRY_STATUSES or is_rate_limited(exc)
+
+
+def backoff(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff.
+    """
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+def retry_delay(exc: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retrying: Retry-After when the server sent one,
+    jittered exponential backoff otherwise.
+    """
+    resp = getattr(exc, "resp", None)
+    retry_after = resp.get("retry-after") if resp is not None else None
+
+    if retry_after:
+        try:
+            return min(MAX_DELAY, float(retry_after))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(retry_after).timestamp()
+                return min(MAX_DELAY, max(0.0, when - time.time()))
+            except (TypeError, ValueError):
+                pass
+
+    return backoff(attempt)
+
+
+# -------------------------------------------------
+# Execution
+# -------------------------------------------------
+
+def call(
+    fn: Callable,
+    endpoint: str,
+    *,
+    tokens: int = 1,
+    idempotent: bool = True,
+):
+    """
+    Run one Drive call through the shared limiter, retrying transient
+    errors (5xx, 429, rate-limit 403s, and for idempotent calls dropped
+    connections).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(tokens)
+        stats.add(stats.calls, endpoint)
+
+        try:
+            result = fn()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e, idempotent):
+                stats.add(stats.failures, endpoint)
+                raise
+            if is_rate_limited(e):
+                limiter.penalize()
+            stats.add(stats.retries, endpoint)
+            time.sleep(retry_delay(e, attempt))
+        else:
+            limiter.reward()
+            return result
+
+
+def execute(request, endpoint: str | None = None):
+    """
+    request.execute() through call(), named after the API method.
+    """
+    method = getattr(request, "methodId", None) or "request"
+    method = method.removeprefix("drive.")
+    return call(
+        request.execute,
+        endpoint or method,
+        idempotent=method not in NON_IDEMPOTENT,
+    )
@@ -1,19 +1,61 @@
+from functools import lru_cache
 import json
-
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+import os
+import sys
 
 from gdsync.config.global_cfg import (
     ensure_global_dir,
     OAUTH_FILE,
     TOKEN_FILE,
 )
+from gdsync.core.http import shared_http
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
 
-def authenticate():
+def _save_token(creds):
+    """
+    Atomically write the token file, readable by the owner only.
+    """
+    tmp = TOKEN_FILE.with_name(TOKEN_FILE.name + ".tmp")
+    # Created 0600 rather than chmodded later, so it is never readable by
+    # others; a leftover from a crashed write may have other permissions.
+    tmp.unlink(missing_ok=True)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as fh:
+        fh.write(creds.to_json())
+    os.replace(tmp, TOKEN_FILE)
+
+
+def _refresh(creds) -> bool:
+    """
+    Refresh an expired access token with its refresh token, without any
+    user interaction. Returns False if the refresh token was rejected.
+    """
+    from google.auth.exceptions import RefreshError
+    from google.auth.transport.requests import Request
+
+    try:
+        creds.refresh(Request())
+    except RefreshError:
+        return False
+
+    _save_token(creds)
+    return True
+
+
+def load_credentials():
+    """
+    Load OAuth credentials.
+
+    An expired access token is refreshed silently and saved back to the
+    token file; the consent flow only runs when there is no usable
+    refresh token, and never when stdin is not a terminal (cron), where
+    it would block forever.
+    """
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     ensure_global_dir()
 
     if not OAUTH_FILE.exists():
@@ -32,7 +74,17 @@ def authenticate():
             TOKEN_FILE, SCOPES
         )
 
+    if creds and not creds.valid and creds.refresh_token:
+        if _refresh(creds):
+            return creds
+
     if not creds or not creds.valid:
+        if not sys.stdin.isatty():
+            raise RuntimeError(
+                "Google authorization has expired or was revoked.\n"
+                "Run `gdsync auth` interactively to sign in again."
+            )
+
         flow = InstalledAppFlow.from_client_config(
             client_config,
             SCOPES,
@@ -47,6 +99,48 @@ def authenticate():
         flow.fetch_token(code=code)
         creds = flow.credentials
 
-        TOKEN_FILE.write_text(creds.to_json())
+        _save_token(creds)
+
+    return creds
 
-    return build("drive", "v3", credentials=creds)
\ No newline at end of file
+
+@lru_cache(None)
+def _discovery_document():
+    """
+    The Drive v3 discovery document bundled with googleapiclient, parsed
+    once per process. None if this client version does not ship it.
+    """
+    from googleapiclient.discovery_cache import get_static_doc
+
+    doc = get_static_doc("drive", "v3")
+    return json.loads(doc) if doc else None
+
+
+def build_service(creds):
+    """
+    Build a Drive client. Each worker thread still builds its own client,
+    but all of them send requests over one shared, pooled keep-alive
+    transport (see core.http).
+
+    Clients are built from the bundled discovery document, so building
+    one (per run and per worker) never fetches or re-parses it.
+    """
+    from googleapiclient.discovery import build, build_from_document
+
+    http = shared_http(creds)
+
+    doc = _discovery_document()
+    if doc is None:
+        return build(
+            "drive",
+            "v3",
+            http=http,
+            static_discovery=True,
+            cache_discovery=False,
+        )
+
+    return build_from_document(doc, http=http)
+
+
+def authenticate():
+    return build_service(load_credentials())
\ No newline at end of file
@@ -0,0 +1,84 @@
+from typing import Dict, Hashable, List, Tuple
+import time
+
+from gdsync.core import api
+
+
+# Drive rejects batches of more than 100 calls.
+BATCH_LIMIT = 100
+
+
+def execute_batch(
+    service,
+    requests: Dict[Hashable, object],
+    *,
+    idempotent: bool = True,
+) -> Tuple[Dict[Hashable, dict], Dict[Hashable, Exception]]:
+    """
+    Execute {key: request} for metadata-only calls through the Drive batch
+    endpoint, BATCH_LIMIT calls per HTTP round trip.
+
+    Calls that fail with a retryable error (rate limits, 5xx) are sent
+    again in a smaller batch after a backoff; with idempotent=False (e.g.
+    creates) a batch whose connection dropped is not. Returns
+    ({key: response}, {key: exception}) so each caller sees its own result.
+    """
+    responses: Dict[Hashable, dict] = {}
+    errors: Dict[Hashable, Exception] = {}
+    retry: List[int] = []
+    keys = list(requests)
+    pending = list(range(len(keys)))
+
+    # Batch request IDs travel in a Content-ID header, so use positions
+    # rather than arbitrary keys.
+    def callback(request_id, response, exception):
+        i = int(request_id)
+        if exception is None:
+            responses[keys[i]] = response
+        elif (
+            api.is_retryable(exception, idempotent)
+            and attempt < api.MAX_RETRIES
+        ):
+            retry.append(i)
+        else:
+            errors[keys[i]] = exception
+
+    for attempt in range(api.MAX_RETRIES + 1):
+        for start in range(0, len(pending), BATCH_LIMIT):
+            chunk = pending[start:start + BATCH_LIMIT]
+            batch = service.new_batch_http_request(callback=callback)
+            for i in chunk:
+                batch.add(requests[keys[i]], request_id=str(i))
+            api.call(
+                batch.execute,
+                "batch",
+                tokens=len(chunk),
+                idempotent=idempotent,
+            )
+
+        if not retry:
+            break
+
+        api.stats.add(api.stats.retries, "batch", len(retry))
+        api.limiter.penalize()
+        time.sleep(api.backoff(attempt))
+        pending, retry = sorted(retry), []
+
+    return responses, errors
+
+
+def execute_batch_strict(
+    service,
+    requests: Dict[Hashable, object],
+    *,
+    idempotent: bool = True,
+) -> Dict[Hashable, dict]:
+    """
+    execute_batch(), raising the first error instead of returning it.
+    """
+    responses, errors = execute_batch(
+        service, requests, idempotent=idempotent
+    )
+    if errors:
+        raise next(iter(errors.values()))
+    return responses
@@ -0,0 +1,274 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List
+import json
+import os
+
+from gdsync.constants import (
+    CONFLICT_LOG_FILE,
+    GDSYNC_DIR,
+    LEGACY_CONFLICT_LOG_FILE,
+)
+from gdsync.core.records import FileRecord
+
+
+# A segment is rotated once it would grow past MAX_BYTES; ROTATE_KEEP
+# older segments are kept as conflicts.jsonl.1 (newest) .. .N (oldest).
+MAX_BYTES = 1024 * 1024
+ROTATE_KEEP = 5
+
+# Records are flushed on every write but fsync-ed only every this many
+# records (and on close), so a large batch of conflicts is not bound by
+# disk sync latency.
+FSYNC_EVERY = 32
+
+# Every record starts with its timestamp, so it can be read without
+# parsing the record: {"ts":"2024-01-01T00:00:00Z",...
+_TS_START = len('{"ts":"')
+_TS_END = _TS_START + len("2024-01-01T00:00:00Z")
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _ts(line: bytes) -> str:
+    return line[_TS_START:_TS_END].decode()
+
+
+def _side(f: FileRecord | None) -> dict | None:
+    if f is None:
+        return None
+    return {"size": f.size, "mtime": f.mtime, "md5": f.md5_hex}
+
+
+def _encode(entry: dict) -> bytes:
+    return (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+
+
+def _legacy(e: dict) -> dict:
+    # conflicts.json stamped local time and kept no MD5s
+    ts = datetime.strptime(e["timestamp"], "%Y-%m-%d %H:%M:%S")
+    return {
+        "ts": ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "path": e["path"],
+        "strategy": e["strategy"],
+        "result": e["result"],
+        "local": {**e["local"], "md5": None} if e.get("local") else None,
+        "drive": {**e["drive"], "md5": None} if e.get("drive") else None,
+    }
+
+
+def _last_line(f) -> bytes:
+    """
+    The last record of a segment, read backwards from the end.
+    """
+    end = f.seek(0, os.SEEK_END)
+    pos = max(0, end - 4096)
+
+    while True:
+        f.seek(pos)
+        chunk = f.read(end - pos)
+        start = chunk.rfind(b"\n", 0, len(chunk) - 1)
+        if start != -1 or pos == 0:
+            return chunk[start + 1:]
+        pos = max(0, pos - 4096)
+
+
+def _seek_since(f, since: str):
+    """
+    Binary-search f to the first record stamped at or after since.
+    """
+    lo, hi = 0, f.seek(0, os.SEEK_END)
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        if mid:
+            f.readline()  # skip to the next record boundary
+        line = f.readline()
+
+        if line.endswith(b"\n") and _ts(line) < since:
+            lo = f.tell()
+        else:
+            hi = mid
+
+    f.seek(lo)
+
+
+# -------------------------------------------------
+# Log
+# -------------------------------------------------
+
+class ConflictLog:
+    """
+    Append-only conflict audit log in .gdsync/conflicts.jsonl.
+    """
+
+    def __init__(self, project_root: Path):
+        self.path = project_root / GDSYNC_DIR / CONFLICT_LOG_FILE
+        self._file = None
+        self._unsynced = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+
+    def _segment(self, n: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{n}")
+
+    def _rotate(self):
+        self.close()
+        self._segment(ROTATE_KEEP).unlink(missing_ok=True)
+        for n in range(ROTATE_KEEP - 1, 0, -1):
+            if self._segment(n).exists():
+                os.replace(self._segment(n), self._segment(n + 1))
+        os.replace(self.path, self._segment(1))
+
+    def _open(self):
+        self.path.parent.mkdir(exist_ok=True)
+        self._migrate()
+        self._file = open(self.path, "ab")
+
+        # Terminate a record torn by a crash, so the next one starts on
+        # its own line
+        if self._file.tell():
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def _migrate(self):
+        """
+        Move records from a pre-JSONL conflicts.json to the front of the log.
+        """
+        legacy = self.path.with_name(LEGACY_CONFLICT_LOG_FILE)
+        if not legacy.exists():
+            return
+
+        try:
+            entries = json.loads(legacy.read_text(encoding="utf-8"))
+        except ValueError:
+            entries = []  # torn by a crash mid-rewrite
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as out:
+            for e in entries:
+                out.write(_encode(_legacy(e)))
+            if self.path.exists():
+                out.write(self.path.read_bytes())
+            out.flush()
+            os.fsync(out.fileno())
+
+        os.replace(tmp, self.path)
+        legacy.unlink()
+
+    def record(
+        self,
+        *,
+        path: str,
+        local: FileRecord | None,
+        drive: FileRecord | None,
+        strategy: str,
+        result: str,
+    ):
+        entry = {
+            "ts": _now(),
+            "path": path,
+            "strategy": strategy,
+            "result": result,
+            "local": _side(local),
+            "drive": _side(drive),
+        }
+        line = _encode(entry)
+
+        if self._file is None:
+            self._open()
+
+        if self._file.tell() and self._file.tell() + len(line) > MAX_BYTES:
+            self._rotate()
+            self._open()
+
+        self._file.write(line)
+        self._file.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._file.close()
+        self._file = None
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+
+    def segments(self) -> List[Path]:
+        """
+        Existing segments, oldest first.
+        """
+        paths = [self._segment(n) for n in range(ROTATE_KEEP, 0, -1)]
+        paths.append(self.path)
+        return [p for p in paths if p.exists()]
+
+    def query(
+        self,
+        *,
+        path: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> Iterator[dict]:
+        """
+        Records in time order under path, stamped in [since, until).
+        """
+        self._migrate()
+
+        needle = json.dumps(path)[1:-1].encode() if path else None
+        prefix = path.rstrip("/") + "/" if path else None
+
+        for segment in self.segments():
+            with open(segment, "rb") as f:
+                if since:
+                    last = _last_line(f)
+                    if len(last) >= _TS_END and _ts(last) < since:
+                        continue
+                    _seek_since(f, since)
+                else:
+                    f.seek(0)
+
+                for line in f:
+                    ts = _ts(line)
+                    if since and ts < since:
+                        continue
+                    if until and ts >= until:
+                        return
+                    if needle and needle not in line:
+                        continue
+
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn by a crash
+                    if path and not (
+                        entry["path"] == path
+                        or entry["path"].startswith(prefix)
+                    ):
+                        continue
+                    yield entry
@@ -0,0 +1,114 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+import threading
+import time
+
+from gdsync.core.drive import (
+    _thread_local,
+    list_drive_directories,
+    list_drive_subdirectories,
+)
+from gdsync.utils.fs import read_json, write_json_atomic
+
+
+# Listings younger than this are shown without asking Drive again.
+TREE_TTL = 3600
+PREFETCH_WORKERS = 4
+
+
+class DirTree:
+    """
+    Drive folder tree behind the interactive chooser, cached in
+    .gdsync/dirs.json.
+
+    Each folder's subfolder listing is stored with the time it was
+    fetched and reused, across runs, until it is TREE_TTL old. While a
+    level is on screen, the listings of the folders shown are fetched in
+    the background, so going deeper is usually instant too.
+
+    Entries: {folder id: {"fetched": unix time, "dirs": [{id, name}]}}.
+    """
+
+    def __init__(self, service_factory, path: Path, ttl: float = TREE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries: Dict[str, dict] = read_json(path, {})
+        self._get_service = _thread_local(service_factory)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+        self._dirty = False
+
+    def _fresh(self, folder_id: str) -> List[dict] | None:
+        entry = self.entries.get(folder_id)
+        if entry and time.time() - entry["fetched"] < self.ttl:
+            return entry["dirs"]
+        return None
+
+    def _fetch(self, folder_id: str) -> List[dict]:
+        service = self._get_service()
+        dirs = (
+            list_drive_directories(service)
+            if folder_id == "root"
+            else list_drive_subdirectories(service, folder_id)
+        )
+        dirs = [{"id": d["id"], "name": d["name"]} for d in dirs]
+
+        with self._lock:
+            self.entries[folder_id] = {"fetched": time.time(), "dirs": dirs}
+            self._dirty = True
+        return dirs
+
+    def children(self, folder_id: str) -> List[dict]:
+        """
+        Subfolders of folder_id: from the cache when fresh, else from a
+        background fetch already under way, else fetched now.
+        """
+        with self._lock:
+            dirs = self._fresh(folder_id)
+            future = self._pending.get(folder_id)
+
+        if dirs is not None:
+            return dirs
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                pass
+        return self._fetch(folder_id)
+
+    def prefetch(self, folder_ids: Iterable[str]):
+        """
+        Fetch these folders' listings in the background. Queued fetches
+        for folders no longer on screen are dropped first.
+        """
+        wanted = list(folder_ids)
+
+        with self._lock:
+            for folder_id, future in list(self._pending.items()):
+                if future.done() or folder_id not in wanted:
+                    future.cancel()
+                    del self._pending[folder_id]
+
+            for folder_id in wanted:
+                if (
+                    folder_id not in self._pending
+                    and self._fresh(folder_id) is None
+                ):
+                    self._pending[folder_id] = self._pool.submit(
+                        self._fetch, folder_id
+                    )
+
+    def refresh(self, folder_id: str) -> List[dict]:
+        with self._lock:
+            self.entries.pop(folder_id, None)
+        return self._fetch(folder_id)
+
+    def close(self):
+        """
+        Stop prefetching and save the cache.
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._dirty:
+            write_json_atomic(self.path, self.entries, separators=(",", ":"))
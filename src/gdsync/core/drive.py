@@ -1,5 +1,25 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from functools import lru_cache
+from pathlib import Path
+import threading
+
+from gdsync.core.api import execute, is_rate_limited
+from gdsync.core.records import FileRecord
+from gdsync.utils.fs import read_json, write_json_atomic
+
+
+FILE_FIELDS = (
+    "id,name,parents,md5Checksum,modifiedTime,size,mimeType,"
+    "shortcutDetails(targetId,targetMimeType)"
+)
+FOLDER_MIME = "application/vnd.google-apps.folder"
+SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+
+# Parent IDs OR-ed into one files.list query; keeps the q string well
+# under Drive's query length limit.
+PARENTS_PER_QUERY = 40
+LIST_WORKERS = 8
 
 
 # -----------------------------
@@ -16,43 +36,128 @@ def _parse_mtime(ts: str | None):
     )
 
 
+def _record(f: dict, parent: str) -> FileRecord:
+    return FileRecord.in_dir(
+        parent,
+        f["name"],
+        md5=f.get("md5Checksum"),
+        size=int(f.get("size", 0)),
+        mtime=_parse_mtime(f.get("modifiedTime")),
+        id=f["id"],
+    )
+
+
 # -----------------------------
-# Folder-based listing
+# Recursive folder listing
 # -----------------------------
 
-def list_drive_files(service, parent_id: str):
-    """
-    List files inside a specific Google Drive folder.
-    """
-    files = []
+def _thread_local(factory):
+    local = threading.local()
+
+    def get():
+        service = getattr(local, "service", None)
+        if service is None:
+            service = local.service = factory()
+        return service
+
+    return get
+
+
+def _list_children(service, parent_ids: list[str]) -> list[dict]:
+    q = " or ".join(f"'{pid}' in parents" for pid in parent_ids)
+    children = []
     page_token = None
 
     while True:
-        resp = service.files().list(
-            q=f"'{parent_id}' in parents and trashed=false",
-            fields=(
-                "nextPageToken, "
-                "files(id,name,md5Checksum,modifiedTime,size)"
-            ),
+        resp = execute(service.files().list(
+            q=f"({q}) and trashed=false",
+            fields=f"nextPageToken, files({FILE_FIELDS})",
+            pageSize=1000,
             pageToken=page_token,
-        ).execute()
-
-        for f in resp.get("files", []):
-            files.append(
-                {
-                    "id": f["id"],
-                    "name": f["name"],
-                    "md5": f.get("md5Checksum"),
-                    "size": int(f.get("size", 0)),
-                    "mtime": _parse_mtime(f.get("modifiedTime")),
-                }
-            )
+        ))
+
+        children.extend(resp.get("files", []))
 
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
 
-    return files
+    return children
+
+
+def list_drive_tree(
+    service,
+    root_id: str,
+    *,
+    service_factory=None,
+    workers: int = LIST_WORKERS,
+    ignore=None,
+    root_path: str = "",
+):
+    """
+    Recursively list a Drive folder one BFS level at a time, then place
+    the items with resolve_drive_paths under root_path.
+    """
+    items: dict[str, dict] = {}
+    listed = {root_id}
+    level = {root_id: [root_path]}
+
+    get_service = _thread_local(service_factory) if service_factory else None
+
+    def list_group(group):
+        svc = get_service() if get_service else service
+        return group, _list_children(svc, group)
+
+    with ThreadPoolExecutor(max_workers=workers if get_service else 1) as pool:
+        while level:
+            ids = list(level)
+            groups = [
+                set(ids[i:i + PARENTS_PER_QUERY])
+                for i in range(0, len(ids), PARENTS_PER_QUERY)
+            ]
+
+            next_level: dict[str, list[str]] = {}
+
+            for group, children in pool.map(list_group, groups):
+                for f in children:
+                    if f["id"] == root_id:
+                        continue
+                    items.setdefault(f["id"], f)
+
+                    if f.get("mimeType") != FOLDER_MIME or f["id"] in listed:
+                        continue
+
+                    # Paths are only tracked here to prune ignored folders
+                    for p in f.get("parents", ()):
+                        if p not in group:
+                            continue
+                        for parent_path in level[p]:
+                            path = (
+                                f"{parent_path}/{f['name']}"
+                                if parent_path
+                                else f["name"]
+                            )
+                            if ignore and ignore.match(path, is_dir=True):
+                                continue
+                            paths = next_level.setdefault(f["id"], [])
+                            if path not in paths:
+                                paths.append(path)
+
+            listed.update(next_level)
+            level = next_level
+
+    # Parents outside the listed tree would place items at the top
+    raw = []
+    for f in items.values():
+        parents = f.get("parents", ())
+        if any(p not in listed for p in parents):
+            f = {**f, "parents": [p for p in parents if p in listed]}
+        raw.append(f)
+
+    files, folders = resolve_drive_paths(raw, root=root_path)
+    if ignore:
+        files = [f for f in files if not ignore.ignores(f.path)]
+    return files, folders
 
 
 # -----------------------------
@@ -67,14 +172,12 @@ def list_all_drive_files(service):
     page_token = None
 
     while True:
-        resp = service.files().list(
+        resp = execute(service.files().list(
             q="trashed=false",
-            fields=(
-                "nextPageToken, "
-                "files(id,name,parents,md5Checksum,modifiedTime,size,mimeType)"
-            ),
+            fields=f"nextPageToken, files({FILE_FIELDS})",
+            pageSize=1000,
             pageToken=page_token,
-        ).execute()
+        ))
 
         files.extend(resp.get("files", []))
 
@@ -85,46 +188,202 @@ def list_all_drive_files(service):
     return files
 
 
-def build_drive_paths(files):
+# -----------------------------
+# Incremental full-drive listing
+# -----------------------------
+
+def _apply_changes(service, files: dict, page_token: str) -> str:
+    """
+    Apply changes.list deltas since page_token to files ({id: raw file}).
+    Returns the new start page token.
+    """
+    while True:
+        resp = execute(service.changes().list(
+            pageToken=page_token,
+            fields=(
+                "nextPageToken, newStartPageToken, "
+                "changes(changeType,fileId,removed,"
+                f"file({FILE_FIELDS},trashed))"
+            ),
+            includeRemoved=True,
+            pageSize=1000,
+        ))
+
+        for change in resp.get("changes", []):
+            # Shared drive changes ("drive") carry no fileId
+            file_id = change.get("fileId")
+            if change.get("changeType", "file") != "file" or not file_id:
+                continue
+
+            f = change.get("file")
+            if change.get("removed") or not f or f.pop("trashed", False):
+                files.pop(file_id, None)
+            else:
+                files[file_id] = f
+
+        if "newStartPageToken" in resp:
+            return resp["newStartPageToken"]
+
+        page_token = resp["nextPageToken"]
+
+
+def _cursor_invalid(exc: Exception) -> bool:
+    """
+    Whether a changes.list error means the page token can no longer be
+    used, as opposed to throttling that outlasted the retries.
+    """
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    if status in (404, 410):
+        return True
+    return status in (400, 403) and not is_rate_limited(exc)
+
+
+def list_all_drive_files_incremental(
+    service,
+    snapshot_path: Path,
+    *,
+    full_relist: bool = False,
+):
     """
-    Build full paths for Drive files using parent relationships.
+    List all files in 'My Drive' using a cached snapshot plus the Changes
+    API cursor stored alongside it. Falls back to a full relist when asked
+    to, when there is no snapshot, or when the cursor is no longer valid.
     """
-    by_id = {f["id"]: f for f in files}
+    snapshot = None if full_relist else read_json(snapshot_path)
+    files = None
+
+    if snapshot:
+        files = {f["id"]: f for f in snapshot["files"]}
+        try:
+            page_token = _apply_changes(
+                service, files, snapshot["page_token"]
+            )
+        except Exception as e:
+            if not _cursor_invalid(e):
+                raise
+            files = None
+
+    if files is None:
+        # Take the cursor before listing, so changes made while the
+        # listing runs are replayed on the next run rather than lost.
+        page_token = execute(service.changes().getStartPageToken())[
+            "startPageToken"
+        ]
+        files = {f["id"]: f for f in list_all_drive_files(service)}
+
+    write_json_atomic(
+        snapshot_path,
+        {"page_token": page_token, "files": list(files.values())},
+        separators=(",", ":"),
+    )
 
-    @lru_cache(None)
-    def resolve_path(file_id):
-        f = by_id[file_id]
-        parents = f.get("parents")
+    return list(files.values())
 
-        if not parents:
-            return f["name"]
 
-        parent_id = parents[0]
-        parent = by_id.get(parent_id)
+def _resolve_shortcut(f: dict, by_id: dict) -> dict | None:
+    """
+    The entry a shortcut syncs as: the target's content under the
+    shortcut's name and parents, if the target is a listed file. None for
+    folder shortcuts and shortcuts to unlisted targets.
+    """
+    target = by_id.get(f.get("shortcutDetails", {}).get("targetId"))
+    if not target or target.get("mimeType") in (FOLDER_MIME, SHORTCUT_MIME):
+        return None
+    return {**target, "name": f["name"], "parents": f.get("parents")}
+
 
-        if not parent:
-            return f["name"]
+def _on_chain(node, folder_id: str) -> bool:
+    while node is not None:
+        if node[0] == folder_id:
+            return True
+        node = node[2]
+    return False
 
-        return f"{resolve_path(parent_id)}/{f['name']}"
 
-    results = []
+def resolve_drive_paths(
+    files,
+    root: str = "",
+) -> tuple[list[FileRecord], dict[str, str]]:
+    """
+    Place a flat Drive listing into a tree without recursion. Returns
+    (file records, {folder path: folder id}) with paths under root.
+    """
+    folder_list = [f for f in files if f.get("mimeType") == FOLDER_MIME]
+    folder_ids = {f["id"] for f in folder_list}
+
+    # Parent folder ID -> child folders; None is the top level
+    children: dict[str | None, list[dict]] = {}
+    for f in folder_list:
+        parents = f.get("parents") or (None,)
+        for parent in {p if p in folder_ids else None for p in parents}:
+            children.setdefault(parent, []).append(f)
+
+    # Folder ID -> every path it appears at. Queue entries are (folder
+    # ID, path, parent entry), so a folder's ancestors can be walked.
+    paths_of: dict[str | None, list[str]] = {None: [root]}
+    folders: dict[str, str] = {}
+    queue = deque([(None, root, None)])
+
+    while queue:
+        node = queue.popleft()
+        parent_id, path, _ = node
+
+        for f in children.get(parent_id, ()):
+            # Only a folder with several parents can close a cycle that
+            # is reachable from the top
+            if len(f.get("parents") or ()) > 1 and _on_chain(node, f["id"]):
+                continue
+
+            child = f"{path}/{f['name']}" if path else f["name"]
+            folders.setdefault(child, f["id"])
+            paths_of.setdefault(f["id"], []).append(child)
+            queue.append((f["id"], child, node))
+
+    records: list[FileRecord] = []
+    top = paths_of[None]
+    by_id = None
 
     for f in files:
-        if f.get("mimeType") == "application/vnd.google-apps.folder":
+        mime = f.get("mimeType")
+        if mime == FOLDER_MIME:
             continue
 
-        results.append(
-            {
-                "id": f["id"],
-                "path": resolve_path(f["id"]),
-                "md5": f.get("md5Checksum"),
-                "size": int(f.get("size", 0)),
-                "mtime": _parse_mtime(f.get("modifiedTime")),
+        # Shortcuts to listed files sync the target; folder shortcuts are
+        # not followed, so a tree is never synced twice
+        if mime == SHORTCUT_MIME:
+            if by_id is None:
+                by_id = {item["id"]: item for item in files}
+            f = _resolve_shortcut(f, by_id)
+            if f is None:
+                continue
+
+        parents = f.get("parents")
+        if parents and len(parents) > 1:
+            paths = {
+                path
+                for p in parents
+                for path in (
+                    paths_of.get(p, ()) if p in folder_ids else top
+                )
             }
-        )
+        else:
+            parent = parents[0] if parents else None
+            # A folder missing from paths_of is unreachable (a cycle)
+            paths = paths_of.get(parent, ()) if parent in folder_ids else top
+
+        for path in paths:
+            records.append(_record(f, path))
+
+    return records, folders
+
+
+def build_drive_paths(files) -> list[FileRecord]:
+    """
+    File records, with full paths, for a flat Drive listing.
+    """
+    return resolve_drive_paths(files)[0]
+
 
-    return results
-    
 def list_drive_directories(service):
     """
     List top-level directories in 'My Drive'.
@@ -133,7 +392,7 @@ def list_drive_directories(service):
     page_token = None
 
     while True:
-        resp = service.files().list(
+        resp = execute(service.files().list(
             q=(
                 "mimeType='application/vnd.google-apps.folder' "
                 "and 'root' in parents "
@@ -141,7 +400,7 @@ def list_drive_directories(service):
             ),
             fields="nextPageToken, files(id,name)",
             pageToken=page_token,
-        ).execute()
+        ))
 
         dirs.extend(resp.get("files", []))
 
@@ -159,7 +418,7 @@ def list_drive_subdirectories(service, parent_id: str):
     page_token = None
 
     while True:
-        resp = service.files().list(
+        resp = execute(service.files().list(
             q=(
                 "mimeType='application/vnd.google-apps.folder' "
                 f"and '{parent_id}' in parents "
@@ -167,7 +426,7 @@ def list_drive_subdirectories(service, parent_id: str):
             ),
             fields="nextPageToken, files(id,name)",
             pageToken=page_token,
-        ).execute()
+        ))
 
         dirs.extend(resp.get("files", []))
 
@@ -176,29 +435,3 @@ def list_drive_subdirectories(service, parent_id: str):
             break
 
     return dirs
-    
-def ensure_drive_folder(service, name: str, parent_id: str) -> str:
-    """
-    Ensure a folder exists in Drive, return its ID.
-    """
-    resp = service.files().list(
-        q=(
-            "mimeType='application/vnd.google-apps.folder' "
-            f"and name='{name}' "
-            f"and '{parent_id}' in parents "
-            "and trashed=false"
-        ),
-        fields="files(id)",
-    ).execute()
-
-    files = resp.get("files", [])
-    if files:
-        return files[0]["id"]
-
-    meta = {
-        "name": name,
-        "mimeType": "application/vnd.google-apps.folder",
-        "parents": [parent_id],
-    }
-    folder = service.files().create(body=meta, fields="id").execute()
-    return folder["id"]    
\ No newline at end of file
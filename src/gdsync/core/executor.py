@@ -1,31 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
-import io
-import sys
+from typing import List
+import hashlib
 import json
+import os
+import threading
+import time
+
+from gdsync.config.project import sync_root
+from gdsync.constants import GDSYNC_DIR, PARTIAL_DIR, UPLOADS_FILE
+from gdsync.core.api import call, execute
+from gdsync.core.batch import execute_batch
+from gdsync.core.conflict_log import ConflictLog
+from gdsync.core.hashing import md5_file
+from gdsync.core.folders import FolderCache
+from gdsync.core.journal import UploadJournal
+from gdsync.core.metrics import metrics
+from gdsync.core.records import FileRecord
+from gdsync.core.transfer import (
+    DEFAULT_CHUNK_BYTES,
+    DEFAULT_WORKERS,
+    LARGE_FILE_BYTES,
+    ChunkSizer,
+    _format_size,
+    run_transfers,
+)
+from gdsync.utils.fs import read_json, write_json_atomic
+
+
+# Below this size a single multipart request is cheaper than opening a
+# resumable session (which costs an extra round trip per file).
+SIMPLE_UPLOAD_BYTES = 5 * 1024 * 1024
 
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
 
-def _format_size(n: int) -> str:
-    for unit in ("B", "KB", "MB", "GB"):
-        if n < 1024:
-            return f"{n:.1f} {unit}"
-        n /= 1024
-    return f"{n:.1f} TB"
-
-
-def _progress_bar(done: int, total: int, width: int = 30) -> str:
-    if total <= 0:
-        return "[?]"
-    ratio = min(done / total, 1.0)
-    filled = int(ratio * width)
-    bar = "#" * filled + "-" * (width - filled)
-    return f"[{bar}] {int(ratio * 100):3d}%"
-
-
 def _fmt_time(ts: float) -> str:
     return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -52,12 +64,12 @@ def report_conflicts(conflicts: list[dict]):
         print(f"{i}) {path}")
         print(f"   Type: {ext[1:] if ext.startswith('.') else ext}")
         print(
-            f"   Local:  {_format_size(local['size'])} | "
-            f"modified {_fmt_time(local['mtime'])}"
+            f"   Local:  {_format_size(local.size)} | "
+            f"modified {_fmt_time(local.mtime)}"
         )
         print(
-            f"   Drive:  {_format_size(drive['size'])} | "
-            f"modified {_fmt_time(drive['mtime'])}"
+            f"   Drive:  {_format_size(drive.size)} | "
+            f"modified {_fmt_time(drive.mtime)}"
         )
 
         if ext == ".pdf":
@@ -70,6 +82,149 @@ def report_conflicts(conflicts: list[dict]):
 # Download
 # -------------------------------------------------
 
+def _fetch_range(service, file_id: str, start: int, end: int) -> bytes:
+    """
+    GET bytes start..end (inclusive) of a file's content.
+    """
+    request = service.files().get_media(fileId=file_id)
+    resp, content = request.http.request(
+        request.uri,
+        method="GET",
+        headers={**request.headers, "range": f"bytes={start}-{end}"},
+    )
+
+    if resp.status == 200:
+        # Server ignored the Range header and sent the whole file
+        return content[start:end + 1]
+    if resp.status != 206:
+        from googleapiclient.errors import HttpError
+
+        raise HttpError(resp, content, uri=request.uri)
+    return content
+
+
+def _split_ranges(size: int, parts: int) -> List[List[int]]:
+    """
+    [start, end, next offset] for `parts` contiguous byte ranges.
+    """
+    step = -(-size // parts)
+    return [
+        [start, min(start + step, size) - 1, start]
+        for start in range(0, size, step)
+    ]
+
+
+def _partial_name(f: FileRecord) -> str:
+    """
+    Name for a download's temp file and journal. One Drive ID can be
+    synced to several paths (multiple parents, shortcuts), so the target
+    path is part of it.
+    """
+    return f"{f.id}-{hashlib.md5(f.path.encode()).hexdigest()[:12]}"
+
+
+def _download_one(
+    service,
+    f: FileRecord,
+    target: Path,
+    progress,
+    *,
+    partial_dir: Path,
+    chunk_size: int,
+    connections: int,
+    service_factory,
+):
+    """
+    Download into .gdsync/partial/<name>.part and rename it over the
+    target only once it is complete and its MD5 matches, so an
+    interrupted run never leaves a truncated file in the tree.
+
+    Files larger than one chunk journal the offset of each byte range in
+    <name>.json and resume from it with HTTP Range requests. Large files
+    are split into `connections` ranges fetched in parallel.
+    """
+    if connections < 1:
+        raise ValueError(f"connections must be at least 1, not {connections}")
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    name = _partial_name(f)
+    part = partial_dir / f"{name}.part"
+    meta_path = partial_dir / f"{name}.json"
+
+    if not f.size:
+        part.write_bytes(execute(service.files().get_media(fileId=f.id)))
+        os.replace(part, target)
+        return
+
+    meta = read_json(meta_path)
+    if (
+        meta
+        and meta["md5"] == f.md5_hex
+        and meta["size"] == f.size
+        and part.exists()
+        and part.stat().st_size == f.size
+    ):
+        ranges = meta["ranges"]
+    else:
+        parts = connections if f.size >= LARGE_FILE_BYTES else 1
+        ranges = _split_ranges(f.size, parts if service_factory else 1)
+        with open(part, "wb") as fh:
+            fh.truncate(f.size)
+
+    journaled = f.size > chunk_size
+    lock = threading.Lock()
+    progress.advance(sum(r[2] - r[0] for r in ranges))
+
+    def fetch(rng, svc):
+        while rng[2] <= rng[1]:
+            end = min(rng[2] + chunk_size - 1, rng[1])
+            data = call(
+                lambda: _fetch_range(svc, f.id, rng[2], end),
+                "media.get",
+            )
+            if not data:
+                raise IOError(f"Empty response for bytes {rng[2]}-{end}")
+
+            os.pwrite(fd, data, rng[2])
+            rng[2] += len(data)
+            progress.advance(len(data))
+
+            if journaled:
+                with lock:
+                    write_json_atomic(
+                        meta_path,
+                        {"md5": f.md5_hex, "size": f.size, "ranges": ranges},
+                    )
+
+    pending = [r for r in ranges if r[2] <= r[1]]
+    fd = os.open(part, os.O_WRONLY)
+
+    try:
+        # Ranges resumed from a journal may outnumber the clients at hand
+        if len(pending) > 1 and service_factory:
+            with ThreadPoolExecutor(max_workers=len(pending) - 1) as pool:
+                futures = [
+                    pool.submit(lambda r: fetch(r, service_factory()), r)
+                    for r in pending[1:]
+                ]
+                fetch(pending[0], service)
+                for future in futures:
+                    future.result()
+        else:
+            for rng in pending:
+                fetch(rng, service)
+    finally:
+        os.close(fd)
+
+    if f.md5 is not None and md5_file(part) != f.md5_hex:
+        part.unlink()
+        meta_path.unlink(missing_ok=True)
+        raise IOError(f"MD5 mismatch after download: {f.path}")
+
+    os.replace(part, target)
+    meta_path.unlink(missing_ok=True)
+
+
 def download_files(
     service,
     downloads,
@@ -77,51 +232,224 @@ def download_files(
     *,
     dry_run: bool = False,
     overwrite: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    service_factory=None,
+    chunk_size: int | None = None,
+    connections: int = 1,
 ):
+    """
+    Download files into the sync root. Interrupted downloads resume from
+    their journaled offsets on the next run.
+    """
     if not downloads:
-        return
+        return []
+
+    chunk_size = chunk_size or DEFAULT_CHUNK_BYTES
+    partial_dir = project_root / GDSYNC_DIR / PARTIAL_DIR
+    partial_dir.mkdir(parents=True, exist_ok=True)
 
-    base_dir = project_root / "Drive"
+    base_dir = sync_root(project_root)
+    jobs = []
 
     for f in downloads:
-        target = base_dir / f["path"]
+        target = base_dir / f.path
 
         if target.exists() and not overwrite:
-            print(f"⚠ Skipping existing file: {f['path']}")
+            print(f"⚠ Skipping existing file: {f.path}")
             continue
 
-        target.parent.mkdir(parents=True, exist_ok=True)
-
-        print(f"\n↓ {f['path']}")
-
         if dry_run:
+            print(f"\n↓ {f.path}")
             print("  (dry-run)")
             continue
 
-        request = service.files().get_media(fileId=f["id"])
-        fh = io.FileIO(target, "wb")
-        downloader = MediaIoBaseDownload(fh, request)
+        jobs.append(f)
+
+    completed, failed = run_transfers(
+        jobs,
+        lambda svc, f, progress: _download_one(
+            svc,
+            f,
+            base_dir / f.path,
+            progress,
+            partial_dir=partial_dir,
+            chunk_size=chunk_size,
+            connections=connections,
+            service_factory=service_factory,
+        ),
+        label="↓",
+        service=service,
+        service_factory=service_factory,
+        workers=workers,
+    )
 
-        total = int(f.get("size", 0))
-        done = False
+    metrics.add("files_downloaded", len(completed))
+    metrics.add("bytes_downloaded", sum(f.size or 0 for f in completed))
 
-        while not done:
-            status, done = downloader.next_chunk()
-            if status:
-                downloaded = int(status.progress() * total)
-                sys.stdout.write(
-                    f"\r{_progress_bar(downloaded, total)} "
-                    f"{_format_size(downloaded)} / {_format_size(total)}"
-                )
-                sys.stdout.flush()
+    if completed:
+        print(f"  ✔ Downloaded {len(completed)} file(s)")
+    if failed:
+        print(f"  ✖ {len(failed)} download(s) failed")
 
-        sys.stdout.write("\n  ✔ Downloaded\n")
+    return completed
 
 
 # -------------------------------------------------
 # Upload
 # -------------------------------------------------
 
+@lru_cache(None)
+def _adaptive_media():
+    """
+    MediaFileUpload whose chunk size follows a shared ChunkSizer; the
+    client library asks for chunksize() before every chunk. Defined on
+    first use so importing this module does not load googleapiclient.
+    """
+    from googleapiclient.http import MediaFileUpload
+
+    class AdaptiveMedia(MediaFileUpload):
+        def __init__(self, filename, sizer: ChunkSizer):
+            super().__init__(filename, chunksize=sizer.size, resumable=True)
+            self._sizer = sizer
+
+        def chunksize(self):
+            return self._sizer.size
+
+    return AdaptiveMedia
+
+
+def _resume_session(request, uri: str, size: int):
+    """
+    Point a fresh upload request at an existing session URI and ask Drive
+    how much of it was committed.
+
+    Returns (offset, response): the offset to continue from, or the final
+    response if the upload had in fact completed. Returns (None, None) if
+    the session is gone.
+    """
+    resp, content = request.http.request(
+        uri,
+        method="PUT",
+        headers={"Content-Length": "0", "Content-Range": f"bytes */{size}"},
+    )
+
+    if resp.status in (200, 201):
+        return size, json.loads(content)
+
+    if resp.status >= 500 or resp.status == 429:
+        from googleapiclient.errors import HttpError
+
+        raise HttpError(resp, content, uri=uri)
+
+    if resp.status != 308:
+        return None, None
+
+    offset = 0
+    if "range" in resp:
+        offset = int(resp["range"].rsplit("-", 1)[1]) + 1
+
+    request.resumable_uri = uri
+    request.resumable_progress = offset
+    return offset, None
+
+
+def _upload_request(service, f: FileRecord, target: str, replace: bool, media):
+    """
+    files().update on an existing file ID (new revision, same metadata),
+    or files().create in a parent folder.
+    """
+    if replace:
+        return service.files().update(fileId=target, media_body=media)
+
+    return service.files().create(
+        body={"name": f.name, "parents": [target]},
+        media_body=media,
+    )
+
+
+def _upload_one(
+    service,
+    f: FileRecord,
+    local_root: Path,
+    target: str,
+    progress,
+    *,
+    replace: bool,
+    journal: UploadJournal,
+    sizer: ChunkSizer,
+):
+    """
+    Upload one file: as a new file in folder `target`, or with
+    replace=True as a new revision of the Drive file whose ID is `target`.
+    """
+    from googleapiclient.http import MediaFileUpload
+
+    path = local_root / f.path
+    st = path.stat()
+
+    if st.st_size < SIMPLE_UPLOAD_BYTES:
+        execute(
+            _upload_request(
+                service,
+                f,
+                target,
+                replace,
+                MediaFileUpload(path, resumable=False),
+            )
+        )
+        progress.advance(st.st_size)
+        return
+
+    request = _upload_request(
+        service,
+        f,
+        target,
+        replace,
+        _adaptive_media()(path, sizer),
+    )
+
+    reported = 0
+    response = None
+
+    session = journal.get(f.path, target, st.st_size, st.st_mtime_ns)
+    if session:
+        offset, response = call(
+            lambda: _resume_session(request, session["uri"], st.st_size),
+            "media.upload",
+        )
+        if offset is None:
+            journal.finish(f.path)
+            session = None
+        else:
+            progress.advance(offset)
+            reported = offset
+
+    while response is None:
+        started = time.monotonic()
+        status, response = call(request.next_chunk, "media.upload")
+        elapsed = time.monotonic() - started
+
+        sent = status.resumable_progress if status else st.st_size
+        sizer.record(sent - reported, elapsed)
+
+        if status:
+            if session is None:
+                journal.start(
+                    f.path,
+                    request.resumable_uri,
+                    target,
+                    st.st_size,
+                    st.st_mtime_ns,
+                )
+                session = {"uri": request.resumable_uri}
+            journal.advance(f.path, status.resumable_progress)
+            progress.advance(status.resumable_progress - reported)
+            reported = status.resumable_progress
+
+    journal.finish(f.path)
+    progress.advance(st.st_size - reported)
+
+
 def upload_files(
     service,
     uploads,
@@ -129,68 +457,79 @@ def upload_files(
     *,
     dry_run: bool = False,
     overwrite: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    service_factory=None,
+    folders: FolderCache | None = None,
+    chunk_size: int | None = None,
 ):
+    """
+    Upload files, creating missing Drive folders first.
+
+    With overwrite=True, records that carry a Drive file ID replace that
+    file's content in place (files().update) instead of creating a second
+    file with the same name next to it.
+
+    Files from SIMPLE_UPLOAD_BYTES up go through resumable sessions that
+    are journaled in .gdsync/uploads.json, so an interrupted upload picks
+    up from its last committed chunk on the next run. chunk_size fixes the
+    chunk size; by default it adapts to the measured throughput.
+    """
     if not uploads:
-        return
-
-    from gdsync.core.drive import ensure_drive_folder
-
-    local_root = (
-        project_root / "Drive"
-        if (project_root / "Drive").exists()
-        else project_root
+        return []
+
+    local_root = sync_root(project_root)
+    journal = UploadJournal(project_root / GDSYNC_DIR / UPLOADS_FILE)
+    sizer = ChunkSizer(chunk_size)
+
+    if folders is None:
+        folders = FolderCache()
+
+    # Folders are created up front, level by level, before any worker
+    # starts: creating the same folder from two workers would leave
+    # duplicates in Drive.
+    folders.ensure(
+        service,
+        {f.parent for f in uploads if not (overwrite and f.id)},
+        dry_run=dry_run,
     )
 
-    drive_root_id = "root"
-    folder_cache = {"": drive_root_id}
+    jobs = []
 
     for f in uploads:
-        rel = Path(f["path"])
-        dirs, filename = rel.parts[:-1], rel.parts[-1]
-
-        parent_id = drive_root_id
-        current = ""
-
-        for d in dirs:
-            current = f"{current}/{d}" if current else d
-            if current not in folder_cache:
-                folder_cache[current] = (
-                    "dry-run"
-                    if dry_run
-                    else ensure_drive_folder(service, d, parent_id)
-                )
-            parent_id = folder_cache[current]
-
-        print(f"\n↑ {f['path']}")
-
         if dry_run:
+            print(f"\n↑ {f.path}")
             print("  (dry-run)")
             continue
 
-        media = MediaFileUpload(
-            local_root / f["path"],
-            resumable=True,
-        )
-
-        request = service.files().create(
-            body={"name": filename, "parents": [parent_id]},
-            media_body=media,
-        )
+        jobs.append(f)
+
+    completed, failed = run_transfers(
+        jobs,
+        lambda svc, f, progress: _upload_one(
+            svc,
+            f,
+            local_root,
+            f.id if overwrite and f.id else folders.get(f.parent),
+            progress,
+            replace=bool(overwrite and f.id),
+            journal=journal,
+            sizer=sizer,
+        ),
+        label="↑",
+        service=service,
+        service_factory=service_factory,
+        workers=workers,
+    )
 
-        total = f["size"]
-        response = None
+    metrics.add("files_uploaded", len(completed))
+    metrics.add("bytes_uploaded", sum(f.size or 0 for f in completed))
 
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                uploaded = int(status.progress() * total)
-                sys.stdout.write(
-                    f"\r{_progress_bar(uploaded, total)} "
-                    f"{_format_size(uploaded)} / {_format_size(total)}"
-                )
-                sys.stdout.flush()
+    if completed:
+        print(f"  ✔ Uploaded {len(completed)} file(s)")
+    if failed:
+        print(f"  ✖ {len(failed)} upload(s) failed")
 
-        sys.stdout.write("\n  ✔ Uploaded\n")
+    return completed
 
 
 # -------------------------------------------------
@@ -205,9 +544,21 @@ def resolve_conflicts(
     *,
     yes: bool = False,
     dry_run: bool = False,
+    folders: FolderCache | None = None,
 ):
+    """
+    Resolve conflicts and return the records that are now identical on
+    both sides.
+    """
     if not conflicts:
-        return
+        return []
+
+    if folders is None:
+        folders = FolderCache()
+
+    synced = []
+    keep_both = []
+    log = ConflictLog(project_root)
 
     print("\n⚠ Resolving conflicts\n")
 
@@ -238,6 +589,7 @@ def resolve_conflicts(
                 action = "keep-both"
             else:
                 print("  Skipped")
+                _log_resolution(log, c, "skip", [], dry_run)
                 continue
         else:
             action = strategy
@@ -248,13 +600,15 @@ def resolve_conflicts(
         if action == "prefer-drive":
             print("  ↓ Overwriting local with Drive")
 
-            download_files(
+            done = download_files(
                 service,
                 [drive],
                 project_root,
                 dry_run=dry_run,
                 overwrite=True,
             )
+            _log_resolution(log, c, action, done, dry_run)
+            synced += done
 
         # -----------------------------
         # PREFER LOCAL
@@ -262,13 +616,16 @@ def resolve_conflicts(
         elif action == "prefer-local":
             print("  ↑ Overwriting Drive with local")
 
-            upload_files(
+            done = upload_files(
                 service,
-                [local],
+                [local.replace(id=drive.id)],
                 project_root,
                 dry_run=dry_run,
                 overwrite=True,
+                folders=folders,
             )
+            _log_resolution(log, c, action, done, dry_run)
+            synced += done
 
         # -----------------------------
         # KEEP BOTH
@@ -276,72 +633,104 @@ def resolve_conflicts(
         elif action == "keep-both":
             print("  ↔ Keeping both copies")
 
-            local_copy = local.copy()
-            drive_copy = drive.copy()
-
-            local_copy["path"] = _with_suffix(path, "(local copy)")
-            drive_copy["path"] = _with_suffix(path, "(drive copy)")
-
             if dry_run:
-                print(f"    Local → {local_copy['path']}")
-                print(f"    Drive → {drive_copy['path']}")
+                print(f"    Local → {_with_suffix(path, '(local copy)')}")
+                print(f"    Drive → {_with_suffix(path, '(drive copy)')}")
                 continue
 
-            download_files(
-                service,
-                [drive_copy],
-                project_root,
-                overwrite=False,
-            )
-
-            upload_files(
-                service,
-                [local_copy],
-                project_root,
-                overwrite=False,
-            )
+            keep_both.append(c)
 
         else:
             print("  Skipped")
+            _log_resolution(log, c, "skip", [], dry_run)
+
+    if keep_both:
+        synced += _keep_both(service, keep_both, project_root, folders, log)
+
+    log.close()
+    return synced
+
+
+def _log_resolution(log: ConflictLog, c: dict, action: str, done, dry_run):
+    """
+    Append one resolution to the conflict log; dry runs are not logged.
+    """
+    if dry_run:
+        return
 
-def _conflict_log_path(project_root: Path) -> Path:
-    return project_root / ".gdsync" / "conflicts.json"
+    if action == "skip":
+        result = "skipped"
+    else:
+        result = "ok" if done else "failed"
+
+    log.record(
+        path=c["path"],
+        local=c["local"],
+        drive=c["drive"],
+        strategy=action,
+        result=result,
+    )
 
 
-def log_conflict(
+def _keep_both(
+    service,
+    conflicts: list[dict],
     project_root: Path,
-    *,
-    path: str,
-    local: dict,
-    drive: dict,
-    strategy: str,
-    result: str,
+    folders,
+    log: ConflictLog,
 ):
-    log_file = _conflict_log_path(project_root)
-    log_file.parent.mkdir(exist_ok=True)
-
-    entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "path": path,
-        "local": {
-            "size": local.get("size"),
-            "mtime": local.get("mtime"),
-        },
-        "drive": {
-            "size": drive.get("size"),
-            "mtime": drive.get("mtime"),
-        },
-        "strategy": strategy,
-        "result": result,
+    """
+    Rename the Drive side to "<name> (drive copy)" and the local side to
+    "<name> (local copy)", then transfer each copy to the other side.
+
+    The Drive renames are metadata-only and go out together in batches,
+    so keeping both copies of many files costs a handful of round trips
+    rather than one per file.
+    """
+    local_root = sync_root(project_root)
+
+    renames = {
+        c["path"]: service.files().update(
+            fileId=c["drive"].id,
+            body={"name": Path(_with_suffix(c["path"], "(drive copy)")).name},
+            fields="id",
+        )
+        for c in conflicts
     }
+    renamed, errors = execute_batch(service, renames)
 
-    if log_file.exists():
-        with open(log_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
+    for path, e in errors.items():
+        print(f"  ✖ {path}: {e}")
+
+    downloads = []
+    uploads = []
 
-    data.append(entry)
+    for c in conflicts:
+        if c["path"] not in renamed:
+            continue
+
+        local_copy = _with_suffix(c["path"], "(local copy)")
+        target = local_root / local_copy
+
+        if target.exists():
+            print(f"⚠ Not overwriting existing file: {local_copy}")
+        else:
+            os.replace(local_root / c["path"], target)
+            uploads.append(c["local"].replace(path=local_copy))
+
+        downloads.append(
+            c["drive"].replace(path=_with_suffix(c["path"], "(drive copy)"))
+        )
+
+    synced = download_files(service, downloads, project_root)
+    synced += upload_files(service, uploads, project_root, folders=folders)
+
+    # Kept both once the Drive copy is renamed and fetched
+    fetched = {f.path for f in synced}
+    for c in conflicts:
+        drive_copy = _with_suffix(c["path"], "(drive copy)")
+        _log_resolution(
+            log, c, "keep-both", drive_copy in fetched, dry_run=False
+        )
 
-    with open(log_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)            
\ No newline at end of file
+    return synced
@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List
+
+from gdsync.core.batch import execute_batch_strict
+from gdsync.core.drive import FOLDER_MIME
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def _quote(name: str) -> str:
+    return name.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def _split(path: str):
+    parent, _, name = path.rpartition("/")
+    return parent, name
+
+
+# -------------------------------------------------
+# Folder cache
+# -------------------------------------------------
+
+class FolderCache:
+    """
+    Drive folder path -> folder ID for one sync run.
+
+    A cache built from a complete listing is authoritative: any folder it
+    does not know about is created without looking it up first.
+    """
+
+    def __init__(self, root_id: str = "root", *, complete: bool = False):
+        self.ids: Dict[str, str] = {"": root_id}
+        self.complete = complete
+        self._created = set()
+
+    @classmethod
+    def from_paths(cls, paths: Dict[str, str], root_id: str):
+        """
+        Build the cache from a complete {folder path: id} map.
+        """
+        cache = cls(root_id, complete=True)
+        cache.ids.update(paths)
+        return cache
+
+    def get(self, path: str) -> str:
+        return self.ids[path]
+
+    def find(self, service, path: str) -> str | None:
+        """
+        ID of an existing folder path, looked up one level at a time and
+        cached. None if any part of the path does not exist on Drive.
+        """
+        parts = path.split("/")
+
+        for depth in range(1, len(parts) + 1):
+            d = "/".join(parts[:depth])
+            if d not in self.ids:
+                self._lookup(service, [d])
+                if d not in self.ids:
+                    return None
+
+        return self.ids[path]
+
+    def ensure(self, service, dirs: Iterable[str], *, dry_run: bool = False):
+        """
+        Make sure every folder path in dirs (and its ancestors) exists.
+
+        Missing folders are handled one depth level at a time, so a new
+        tree costs O(depth) batched round trips rather than one lookup and
+        one create per directory.
+        """
+        missing = set()
+        for d in dirs:
+            while d and d not in self.ids:
+                missing.add(d)
+                d = _split(d)[0]
+
+        by_depth: Dict[int, List[str]] = {}
+        for d in missing:
+            by_depth.setdefault(d.count("/"), []).append(d)
+
+        for depth in sorted(by_depth):
+            level = sorted(by_depth[depth])
+
+            if dry_run:
+                for d in level:
+                    self.ids[d] = "dry-run"
+                continue
+
+            # Children of folders created in this run cannot exist yet
+            lookup = [d for d in level if _split(d)[0] not in self._created]
+            if not self.complete and lookup:
+                self._lookup(service, lookup)
+                level = [d for d in level if d not in self.ids]
+
+            self._create(service, level)
+
+    def _lookup(self, service, level: List[str]):
+        requests = {}
+        for d in level:
+            parent, name = _split(d)
+            requests[d] = service.files().list(
+                q=(
+                    f"mimeType='{FOLDER_MIME}' "
+                    f"and name='{_quote(name)}' "
+                    f"and '{self.ids[parent]}' in parents "
+                    "and trashed=false"
+                ),
+                fields="files(id)",
+            )
+
+        for d, resp in execute_batch_strict(service, requests).items():
+            found = resp.get("files", [])
+            if found:
+                self.ids[d] = found[0]["id"]
+
+    def _create(self, service, level: List[str]):
+        requests = {}
+        for d in level:
+            parent, name = _split(d)
+            requests[d] = service.files().create(
+                body={
+                    "name": name,
+                    "mimeType": FOLDER_MIME,
+                    "parents": [self.ids[parent]],
+                },
+                fields="id",
+            )
+
+        created = execute_batch_strict(service, requests, idempotent=False)
+        for d, resp in created.items():
+            self.ids[d] = resp["id"]
+            self._created.add(d)
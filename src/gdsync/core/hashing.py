@@ -0,0 +1,87 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple, TypeVar
+import hashlib
+import mmap
+import os
+
+
+# hashlib releases the GIL while digesting buffers, so a thread pool scales
+# with cores for MD5 without the pickling overhead of a process pool.
+READ_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+T = TypeVar("T")
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def md5_file(path: Path) -> str:
+    """
+    MD5 of a file, using mmap for large files and 1 MiB reads otherwise.
+    """
+    h = hashlib.md5()
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            buf = bytearray(READ_SIZE)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+
+    return h.hexdigest()
+
+
+# -------------------------------------------------
+# Engine
+# -------------------------------------------------
+
+def hash_stream(
+    items: Iterable[Tuple[T, Optional[Path]]],
+    workers: int | None = None,
+) -> Iterator[Tuple[T, Optional[str]]]:
+    """
+    Hash (item, path) pairs concurrently, yielding (item, md5) in input
+    order. Pairs with no path are passed through with md5 None.
+
+    Only a bounded window of files is in flight at once, so the input can
+    be a lazy directory walk of any size.
+    """
+    workers = workers or default_workers()
+
+    if workers <= 1:
+        for item, path in items:
+            yield item, md5_file(path) if path is not None else None
+        return
+
+    window = workers * 4
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for item, path in items:
+            future = pool.submit(md5_file, path) if path is not None else None
+            pending.append((item, future))
+
+            while len(pending) > window:
+                item, future = pending.popleft()
+                yield item, future.result() if future else None
+
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result() if future else None
+
@@ -0,0 +1,77 @@
+from functools import lru_cache
+
+
+# Enough pooled connections for the listing workers plus every transfer
+# worker's byte ranges; extra connections beyond this are not kept alive.
+POOL_SIZE = 32
+TIMEOUT = 120
+
+
+class _Response(dict):
+    """
+    The httplib2.Response shape googleapiclient expects: lower-cased
+    headers as a dict, plus status and reason attributes.
+    """
+
+    def __init__(self, status: int, reason: str, headers):
+        super().__init__((k.lower(), v) for k, v in headers.items())
+        self["status"] = str(status)
+        self.status = status
+        self.reason = reason
+
+
+class SessionHttp:
+    """
+    httplib2.Http stand-in backed by one google-auth AuthorizedSession.
+
+    Every Drive client in the process shares it, so all calls reuse the
+    same keep-alive connection pool instead of each client opening its
+    own TLS connections; the session refreshes the access token itself.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def request(
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=5,
+        connection_type=None,
+    ):
+        import requests
+
+        try:
+            r = self.session.request(
+                method,
+                uri,
+                data=body,
+                headers=headers,
+                timeout=TIMEOUT,
+                allow_redirects=False,
+            )
+        except requests.exceptions.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+
+        return _Response(r.status_code, r.reason, r.headers), r.content
+
+
+@lru_cache(None)
+def shared_http(creds) -> SessionHttp:
+    """
+    The process-wide pooled transport for a set of credentials.
+    """
+    import requests
+    from google.auth.transport.requests import AuthorizedSession
+
+    session = AuthorizedSession(creds)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=POOL_SIZE,
+    )
+    session.mount("https://", adapter)
+    return SessionHttp(session)
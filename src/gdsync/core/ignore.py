@@ -0,0 +1,187 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+import re
+
+from gdsync.constants import GDSYNC_DIR, IGNORE_FILE
+
+
+# -------------------------------------------------
+# Pattern translation
+# -------------------------------------------------
+
+def _translate(pattern: str) -> str:
+    """
+    Regex for one gitignore glob: * and ? never cross a "/", ** spans
+    directories, [...] is a character class and backslash escapes.
+    """
+    out = []
+    i, n = 0, len(pattern)
+
+    while i < n:
+        c = pattern[i]
+
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if pattern.startswith("/", i):
+                    # "**/": zero or more leading directories
+                    out.append("(?:.*/)?")
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append("[^/]*")
+
+        elif c == "?":
+            out.append("[^/]")
+
+        elif c == "[":
+            # A "]" right after "[" or "[!" is a literal member
+            start = i + 1
+            if pattern[start:start + 1] in ("!", "^"):
+                start += 1
+            end = pattern.find("]", start + 1)
+
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+
+        else:
+            out.append(re.escape(c))
+
+        i += 1
+
+    return "".join(out)
+
+
+def _parse(line: str) -> Tuple[str, bool, bool] | None:
+    """
+    (regex, negated, directory only) for one .gdsyncignore line, or None
+    for blank lines and comments.
+    """
+    line = line.rstrip("\n")
+
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the root;
+    # otherwise it matches a name at any depth.
+    anchored = "/" in line
+    regex = _translate(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+
+    return regex, negated, dir_only
+
+
+# -------------------------------------------------
+# Matcher
+# -------------------------------------------------
+
+class IgnoreMatcher:
+    """
+    Compiled .gdsyncignore rules (gitignore syntax).
+
+    All patterns are compiled into one alternation per kind of path, in
+    reverse order, so a single regex match finds the *last* matching
+    pattern, which decides (as in git) whether the path is ignored or
+    re-included with "!".
+
+    Paths are relative to the sync root and use "/" separators.
+    """
+
+    def __init__(self, lines: Iterable[str] = ()):
+        rules = [rule for rule in map(_parse, lines) if rule]
+        self.rules = rules
+        self._dir_re, self._dir_negated = self._compile(rules)
+        self._file_re, self._file_negated = self._compile(
+            [rule for rule in rules if not rule[2]]
+        )
+        self._parents: Dict[str, bool] = {}
+
+    @classmethod
+    def load(cls, project_root: Path) -> "IgnoreMatcher":
+        path = project_root / GDSYNC_DIR / IGNORE_FILE
+        try:
+            return cls(path.read_text().splitlines())
+        except FileNotFoundError:
+            return cls()
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]):
+        if not rules:
+            return None, []
+        ordered = rules[::-1]
+        regex = re.compile(
+            "(?:" + "|".join(f"({rule[0]})" for rule in ordered) + r")\Z",
+            re.DOTALL,
+        )
+        # Pattern bodies contain no capturing groups, so group k is rule k
+        return regex, [rule[1] for rule in ordered]
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Whether the rules ignore this path itself. Callers walking a tree
+        prune ignored directories, so ancestors need no checking here.
+        """
+        regex, negated = (
+            (self._dir_re, self._dir_negated)
+            if is_dir
+            else (self._file_re, self._file_negated)
+        )
+        if regex is None:
+            return False
+
+        m = regex.match(path)
+        return bool(m) and not negated[m.lastindex - 1]
+
+    def ignores(self, path: str) -> bool:
+        """
+        Whether a file path is ignored, directly or because one of its
+        directories is. Directory verdicts are cached, so filtering a
+        flat listing costs about one regex match per file.
+        """
+        if not self.rules:
+            return False
+
+        parent = path.rpartition("/")[0]
+        return self._parent_ignored(parent) or self.match(path)
+
+    def _parent_ignored(self, parent: str) -> bool:
+        if not parent:
+            return False
+
+        verdict = self._parents.get(parent)
+        if verdict is None:
+            verdict = self._parent_ignored(
+                parent.rpartition("/")[0]
+            ) or self.match(parent, is_dir=True)
+            self._parents[parent] = verdict
+        return verdict
@@ -0,0 +1,74 @@
+from pathlib import Path
+import threading
+import time
+
+from gdsync.utils.fs import read_json, write_json_atomic
+
+
+# Drive keeps a resumable session alive for about a week; leave a margin.
+SESSION_TTL = 6 * 24 * 3600
+
+
+class UploadJournal:
+    """
+    Resumable upload sessions that are still in flight, persisted in
+    .gdsync/uploads.json so an interrupted upload continues from its last
+    committed offset on the next run instead of from byte 0.
+
+    Entries are keyed by path and remember what the session was opened
+    for (the target folder or file ID, and the local size and mtime). A
+    session whose local file or target has changed since is discarded.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sessions = read_json(path, {})
+        self._lock = threading.Lock()
+
+    def get(self, key: str, target: str, size: int, mtime_ns: int) -> dict | None:
+        with self._lock:
+            session = self.sessions.get(key)
+
+            if session is None:
+                return None
+
+            if (
+                session["target"] != target
+                or session["size"] != size
+                or session["mtime_ns"] != mtime_ns
+                or time.time() - session["created"] > SESSION_TTL
+            ):
+                del self.sessions[key]
+                self._save()
+                return None
+
+            return dict(session)
+
+    def start(self, key: str, uri: str, target: str, size: int, mtime_ns: int):
+        with self._lock:
+            self.sessions[key] = {
+                "uri": uri,
+                "target": target,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "offset": 0,
+                "created": time.time(),
+            }
+            self._save()
+
+    def advance(self, key: str, offset: int):
+        with self._lock:
+            if key in self.sessions:
+                self.sessions[key]["offset"] = offset
+                self._save()
+
+    def finish(self, key: str):
+        with self._lock:
+            if self.sessions.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        if self.sessions:
+            write_json_atomic(self.path, self.sessions)
+        else:
+            self.path.unlink(missing_ok=True)
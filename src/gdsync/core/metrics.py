@@ -0,0 +1,199 @@
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+import threading
+import time
+
+from gdsync.core import api
+from gdsync.utils.fs import write_json_atomic
+
+
+# Rates derived from a counter and the span it accrues in.
+RATES = [
+    ("files_scanned", "plan.scan"),
+    ("bytes_hashed", "plan.scan"),
+    ("bytes_downloaded", "run.downloads"),
+    ("bytes_uploaded", "run.uploads"),
+]
+
+
+# -------------------------------------------------
+# Registry
+# -------------------------------------------------
+
+class Metrics:
+    """
+    Per-phase wall time and event counters for one process.
+
+    Spans are cheap enough to leave on everywhere: one clock read at each
+    end of a phase. Counters are bumped once per file or batch, never per
+    byte or per chunk.
+    """
+
+    def __init__(self):
+        self.spans: dict[str, list] = {}
+        self.counters = Counter()
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self.spans.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def seconds(self, name: str) -> float:
+        with self._lock:
+            return self.spans.get(name, [0, 0.0])[1]
+
+    def snapshot(self) -> dict:
+        """
+        Everything recorded so far, with Drive API counts by endpoint and
+        derived rates, as plain JSON-able data.
+        """
+        with self._lock:
+            spans = {
+                name: {"count": count, "seconds": round(seconds, 6)}
+                for name, (count, seconds) in sorted(self.spans.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+
+        rates = {}
+        for counter, span in RATES:
+            seconds = self.seconds(span)
+            if seconds and counters.get(counter):
+                rates[f"{counter}_per_second"] = round(
+                    counters[counter] / seconds, 1
+                )
+
+        return {
+            "started": self.started,
+            "spans": spans,
+            "counters": counters,
+            "rates": rates,
+            "api": api.stats.summary(),
+        }
+
+
+metrics = Metrics()
+
+
+# -------------------------------------------------
+# Output
+# -------------------------------------------------
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text(snapshot: dict, status: int = 0) -> str:
+    """
+    The snapshot in Prometheus text exposition format, for the
+    node_exporter textfile collector. Values describe the last run, so
+    they are all gauges.
+    """
+    lines = []
+
+    def metric(name: str, help_text: str, samples):
+        lines.append(f"# HELP gdsync_{name} {help_text}")
+        lines.append(f"# TYPE gdsync_{name} gauge")
+        for labels, value in samples:
+            lines.append(f"gdsync_{name}{labels} {value}")
+
+    metric(
+        "last_run_timestamp_seconds",
+        "Start time of the last gdsync run.",
+        [("", snapshot["started"])],
+    )
+    metric(
+        "last_run_success",
+        "Whether the last gdsync run exited with status 0.",
+        [("", int(status == 0))],
+    )
+    metric(
+        "phase_seconds",
+        "Wall time spent in each phase of the last run.",
+        [
+            (f'{{phase="{_label(name)}"}}', span["seconds"])
+            for name, span in snapshot["spans"].items()
+        ],
+    )
+
+    for kind in ("calls", "retries", "failures"):
+        metric(
+            f"drive_api_{kind}",
+            f"Drive API {kind} in the last run, by endpoint.",
+            [
+                (f'{{endpoint="{_label(endpoint)}"}}', counts[kind])
+                for endpoint, counts in snapshot["api"].items()
+            ],
+        )
+
+    for name, value in snapshot["counters"].items():
+        metric(name, f"{name.replace('_', ' ').capitalize()}.", [("", value)])
+
+    for name, value in snapshot["rates"].items():
+        metric(
+            name,
+            f"{name.replace('_', ' ').capitalize()} in the last run.",
+            [("", value)],
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: Path, status: int = 0):
+    """
+    Write the current snapshot as JSON and as a Prometheus textfile
+    (same name, .json and .prom suffixes). Both are replaced atomically,
+    as the textfile collector requires.
+    """
+    snapshot = metrics.snapshot()
+    snapshot["status"] = status
+    write_json_atomic(path.with_suffix(".json"), snapshot, indent=2)
+
+    prom = path.with_suffix(".prom")
+    tmp = prom.with_name(prom.name + ".tmp")
+    tmp.write_text(prometheus_text(snapshot, status))
+    tmp.replace(prom)
+
+
+def print_summary():
+    """
+    Phase timings and counters, for --profile.
+    """
+    snapshot = metrics.snapshot()
+
+    print("\n⏱ Profile\n")
+    for name, span in snapshot["spans"].items():
+        print(f"  {name:<24} {span['seconds']:>9.3f}s")
+
+    if snapshot["counters"]:
+        print()
+        for name, value in snapshot["counters"].items():
+            print(f"  {name:<24} {value:>12}")
+
+    if snapshot["rates"]:
+        print()
+        for name, value in snapshot["rates"].items():
+            print(f"  {name:<32} {value:>12,.1f}")
+
+    calls = sum(c["calls"] for c in snapshot["api"].values())
+    if calls:
+        print(f"\n  Drive API calls: {calls}")
+        for endpoint, counts in snapshot["api"].items():
+            print(
+                f"    {endpoint:<20} {counts['calls']:>7} "
+                f"(retries {counts['retries']}, "
+                f"failures {counts['failures']})"
+            )
@@ -1,166 +1,559 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 import os
-import hashlib
+import time
 
 from gdsync.core.drive import (
-    list_drive_files,
-    list_all_drive_files,
-    build_drive_paths,
+    list_drive_tree,
+    list_all_drive_files_incremental,
+    resolve_drive_paths,
 )
-from gdsync.config.project import load_config
+from gdsync.core.folders import FolderCache
+from gdsync.core.hashing import hash_stream
+from gdsync.core.ignore import IgnoreMatcher
+from gdsync.core.metrics import metrics
+from gdsync.core.records import FileRecord
+from gdsync.config.project import load_config, sync_root
+from gdsync.config.state import load_state, save_state
+from gdsync.constants import GDSYNC_DIR, REMOTE_FILE
+
+
+# Files modified this close to the scan may change again within the
+# filesystem's mtime granularity, so their hashes are not cached.
+RACY_WINDOW_NS = 2_000_000_000
+
+# Directory listing is syscall-bound and releases the GIL, so a few more
+# threads than cores keep the disk queue busy.
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Directories listed ahead of the walk, per scan worker. Enough to keep
+# every worker busy without holding listings the walk is far from using.
+PREFETCH_PER_WORKER = 4
 
 
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
 
-def _md5(path: Path) -> str:
-    h = hashlib.md5()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+def _path_key(path: str) -> List[str]:
+    """
+    Sort key shared by the local walk and the Drive listing, so the two
+    streams can be merged: paths compare component by component.
+    """
+    return path.split("/")
+
+
+def _list_dir(
+    path: str,
+    prefix: str,
+    ignore: IgnoreMatcher | None,
+) -> List[Tuple[str, str, os.stat_result | None]]:
+    """
+    Sorted (rel_path, full_path, stat) for the entries of one directory,
+    with stat None for subdirectories. Relative paths are built by string
+    concatenation and file stats come from the DirEntry, so no Path
+    objects are created per file.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+    listing = []
+    for entry in entries:
+        # Never sync project metadata
+        if entry.name == GDSYNC_DIR:
+            continue
 
+        rel_path = prefix + entry.name
 
-def _scan_local_files(root: Path) -> List[dict]:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not (ignore and ignore.match(rel_path, is_dir=True)):
+                    listing.append((rel_path, entry.path, None))
+            elif entry.is_file():
+                if not (ignore and ignore.match(rel_path)):
+                    listing.append((rel_path, entry.path, entry.stat()))
+        except OSError:
+            # Removed while the directory was being scanned
+            continue
+
+    return listing
+
+
+def _walk_sorted(
+    root: Path,
+    prefix: str = "",
+    ignore: IgnoreMatcher | None = None,
+    workers: int | None = None,
+) -> Iterator[Tuple[str, str, os.stat_result]]:
     """
-    Scan local files under root and return normalized records.
+    Yield (rel_path, full_path, stat) for files under root in _path_key
+    order, listing up to PREFETCH_PER_WORKER subdirectories per worker
+    ahead of the walk on `workers` threads.
     """
-    files = []
+    workers = workers or SCAN_WORKERS
+    prefix = prefix + "/" if prefix else ""
+
+    if workers <= 1:
+        stack = [iter(_list_dir(str(root), prefix, ignore))]
+        while stack:
+            for rel_path, full_path, stat in stack[-1]:
+                if stat is None:
+                    stack.append(
+                        iter(_list_dir(full_path, rel_path + "/", ignore))
+                    )
+                    break
+                yield rel_path, full_path, stat
+            else:
+                stack.pop()
+        return
 
+    pool = ThreadPoolExecutor(max_workers=workers)
+    window = workers * PREFETCH_PER_WORKER
+
+    # Subdirectories not yet submitted, next in walk order first. Each slot
+    # is [full_path, rel_path, future]; a slot the walk reaches before the
+    # window does is submitted on the spot and skipped here later.
+    waiting = deque()
+    in_flight = 0
+    consumed = object()
+
+    def submit(slot):
+        nonlocal in_flight
+        slot[2] = pool.submit(_list_dir, slot[0], slot[1] + "/", ignore)
+        in_flight += 1
+
+    def top_up():
+        while waiting and in_flight < window:
+            slot = waiting.popleft()
+            if slot[2] is None:
+                submit(slot)
+
+    def expand(listing):
+        entries = []
+        slots = []
+        for rel_path, full_path, stat in listing:
+            slot = None
+            if stat is None:
+                slot = [full_path, rel_path, None]
+                slots.append(slot)
+            entries.append((rel_path, full_path, stat, slot))
+
+        # A directory's children come before its parent's later siblings
+        waiting.extendleft(reversed(slots))
+        top_up()
+        return iter(entries)
+
+    try:
+        stack = [expand(_list_dir(str(root), prefix, ignore))]
+        while stack:
+            for rel_path, full_path, stat, slot in stack[-1]:
+                if slot is not None:
+                    if slot[2] is None:
+                        submit(slot)
+                    listing = slot[2].result()
+                    slot[2] = consumed
+                    in_flight -= 1
+                    stack.append(expand(listing))
+                    break
+                yield rel_path, full_path, stat
+            else:
+                stack.pop()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_local_files(
+    root: Path,
+    index: dict | None = None,
+    hash_workers: int | None = None,
+    ignore: IgnoreMatcher | None = None,
+    scan_workers: int | None = None,
+    prefix: str = "",
+) -> Iterator[FileRecord]:
+    """
+    Lazily scan local files under root, yielding records in _path_key
+    order. root may be a subdirectory of the sync root, at prefix, in
+    which case paths are reported relative to the sync root and only
+    index entries under prefix are pruned.
+
+    If an index ({path: [size, mtime_ns, inode, md5]}) is given, files whose
+    stat tuple is unchanged reuse the cached MD5 instead of being re-read.
+    The index is updated in place and, once the scan is exhausted, pruned
+    of files that no longer exist. Files that do need hashing are hashed
+    concurrently by hash_workers while scan_workers keep walking.
+    """
     if not root.exists():
-        return files
+        return
 
-    for dirpath, dirs, filenames in os.walk(root):
-        # Never sync project metadata
-        if ".gdsync" in dirs:
-            dirs.remove(".gdsync")
-
-        for name in filenames:
-            full_path = Path(dirpath) / name
-            rel_path = full_path.relative_to(root)
-
-            stat = full_path.stat()
-
-            files.append(
-                {
-                    "path": str(rel_path),
-                    "size": stat.st_size,
-                    "mtime": stat.st_mtime,
-                    "md5": _md5(full_path),
-                }
+    if index is None:
+        index = {}
+
+    seen = set()
+    hashed_files = hashed_bytes = 0
+    scan_start_ns = time.time_ns()
+
+    def candidates():
+        walk = _walk_sorted(
+            root, prefix, ignore=ignore, workers=scan_workers
+        )
+        for rel_path, full_path, stat in walk:
+            key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+            record = FileRecord(
+                rel_path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
             )
 
-    return files
+            cached = index.get(rel_path)
+            if cached and cached[:3] == key:
+                record.md5 = bytes.fromhex(cached[3])
+                yield (record, key), None
+            else:
+                yield (record, key), full_path
+
+    for (record, key), md5 in hash_stream(candidates(), hash_workers):
+        if md5 is not None:
+            record.md5 = bytes.fromhex(md5)
+            hashed_files += 1
+            hashed_bytes += record.size
+
+        path = record.path
+        if scan_start_ns - key[1] > RACY_WINDOW_NS:
+            index[path] = key + [record.md5_hex]
+        else:
+            index.pop(path, None)
+
+        seen.add(path)
+        yield record
+
+    metrics.add("files_scanned", len(seen))
+    metrics.add("files_hashed", hashed_files)
+    metrics.add("bytes_hashed", hashed_bytes)
+
+    scope = prefix + "/" if prefix else ""
+    for stale in index.keys() - seen:
+        if stale.startswith(scope):
+            del index[stale]
+
+
+def _scan_local_files(
+    root: Path,
+    index: dict | None = None,
+    hash_workers: int | None = None,
+    ignore: IgnoreMatcher | None = None,
+    scan_workers: int | None = None,
+    prefix: str = "",
+) -> List[FileRecord]:
+    """
+    Scan local files under root and return records.
+    """
+    return list(
+        _iter_local_files(
+            root, index, hash_workers, ignore, scan_workers, prefix
+        )
+    )
+
+
+def _merge(
+    local_files: Iterable[FileRecord],
+    drive_files: List[FileRecord],
+    base: Dict[str, str] | None = None,
+) -> Iterator[Tuple[str, object]]:
+    """
+    Merge a _path_key-ordered local stream with the Drive listing, yielding
+    (kind, entry) decisions as soon as each path is settled. If Drive holds
+    several files at one path, the first is used.
+
+    base maps path -> MD5 at the last successful sync. A file that differs
+    between the two sides is a "push" if only the local copy moved away
+    from the base, a "pull" if only the Drive copy did, and a conflict
+    otherwise (including when there is no base to compare against).
+    """
+    if base is None:
+        base = {}
+
+    drive_sorted = sorted(drive_files, key=lambda f: _path_key(f.path))
+    i = 0
+    last_path = None
+
+    def next_drive():
+        nonlocal i, last_path
+        while i < len(drive_sorted):
+            df = drive_sorted[i]
+            i += 1
+            if df.path != last_path:
+                last_path = df.path
+                return df
+        return None
+
+    df = next_drive()
+
+    for lf in local_files:
+        path = lf.path
+        lkey = _path_key(path)
+
+        while df and _path_key(df.path) < lkey:
+            yield "downloads", df
+            df = next_drive()
+
+        if not df or df.path != path:
+            yield "uploads", lf
+            continue
+
+        base_md5 = base.get(path)
+
+        if lf.md5 and df.md5 and lf.md5 == df.md5:
+            yield "unchanged", lf
+        elif base_md5 and df.md5_hex == base_md5:
+            lf.id = df.id
+            yield "pushes", lf
+        elif base_md5 and lf.md5_hex == base_md5:
+            yield "pulls", df
+        else:
+            yield "conflicts", {
+                "path": path,
+                "local": lf,
+                "drive": df,
+            }
+
+        df = next_drive()
+
+    while df:
+        yield "downloads", df
+        df = next_drive()
 
 
 # -------------------------------------------------
 # Planner
 # -------------------------------------------------
 
-def plan_sync(
+def _list_subtree(
+    service,
+    root_id: str,
+    subtree: str,
+    *,
+    service_factory=None,
+    ignore: IgnoreMatcher | None = None,
+) -> Tuple[List[FileRecord], FolderCache]:
+    """
+    Resolve the folder at subtree under root_id and list it recursively.
+
+    The folder cache knows the subtree's ancestors and every folder below
+    it, so it is complete for anything a scoped run can upload. If the
+    subtree does not exist on Drive yet, nothing is listed and missing
+    folders are looked up before being created.
+    """
+    folders = FolderCache(root_id)
+    folder_id = folders.find(service, subtree)
+    if folder_id is None:
+        return [], folders
+
+    drive_files, folder_ids = list_drive_tree(
+        service,
+        folder_id,
+        service_factory=service_factory,
+        ignore=ignore,
+        root_path=subtree,
+    )
+    folders.ids.update(folder_ids)
+    folders.complete = True
+    return drive_files, folders
+
+
+def list_remote(
+    service,
+    project_root: Path,
+    config: dict,
+    *,
+    full_relist: bool = False,
+    service_factory=None,
+    ignore: IgnoreMatcher | None = None,
+    subtree: str | None = None,
+) -> Tuple[List[FileRecord], FolderCache]:
+    """
+    List the Drive side of a project: the folder tree for folder projects,
+    the cached snapshot plus the Changes API for full-drive projects.
+
+    With a subtree (a folder path relative to the sync root), only that
+    folder is resolved and listed, whatever the scope, so the cost is
+    proportional to the subtree rather than to the whole Drive.
+
+    Ignored files are dropped; in folder projects and subtrees ignored
+    folders are not listed at all.
+    """
+    sync_scope = config.get("sync_scope")
+
+    if subtree:
+        if sync_scope not in ("folder", "full_drive"):
+            raise RuntimeError(f"Unknown sync_scope: {sync_scope}")
+
+        root_id = (
+            config["drive_folder_id"] if sync_scope == "folder" else "root"
+        )
+        return _list_subtree(
+            service,
+            root_id,
+            subtree,
+            service_factory=service_factory,
+            ignore=ignore,
+        )
+
+    if sync_scope == "folder":
+        drive_files, folder_ids = list_drive_tree(
+            service,
+            config["drive_folder_id"],
+            service_factory=service_factory,
+            ignore=ignore,
+        )
+        return drive_files, FolderCache.from_paths(
+            folder_ids,
+            config["drive_folder_id"],
+        )
+
+    if sync_scope == "full_drive":
+        with metrics.span("plan.list_drive"):
+            raw_files = list_all_drive_files_incremental(
+                service,
+                project_root / GDSYNC_DIR / REMOTE_FILE,
+                full_relist=full_relist,
+            )
+        with metrics.span("plan.resolve_paths"):
+            drive_files, folder_ids = resolve_drive_paths(raw_files)
+        if ignore:
+            drive_files = [
+                f for f in drive_files if not ignore.ignores(f.path)
+            ]
+        return drive_files, FolderCache.from_paths(folder_ids, "root")
+
+    raise RuntimeError(f"Unknown sync_scope: {sync_scope}")
+
+
+def stream_sync(
     service,
     project_root: Path,
     download_dir: str | None = None,
-) -> Dict[str, List]:
+    hash_workers: int | None = None,
+    full_relist: bool = False,
+    service_factory=None,
+) -> Tuple[FolderCache, Iterator[Tuple[str, object]]]:
     """
-    Plan a sync between local filesystem and Google Drive.
+    Plan a sync incrementally.
 
-    Returns:
-      {
-        uploads: [...],
-        downloads: [...],
-        unchanged: [...],
-        conflicts: [...]
-      }
+    The Drive side is listed up front; the local side is walked and hashed
+    lazily. Returns the run's folder cache and an iterator of (kind, entry)
+    decisions, where kind is one of "uploads", "downloads", "pushes",
+    "pulls", "unchanged" or "conflicts". The hash index and the pruned
+    base are saved once the iterator is exhausted.
     """
     config = load_config()
-    sync_scope = config.get("sync_scope")
+    ignore = IgnoreMatcher.load(project_root)
 
     # -------------------------------------------------
     # Local root selection
     # -------------------------------------------------
-    local_root = project_root
-    if sync_scope == "full_drive":
-        local_root = project_root / "Drive"
-        local_root.mkdir(exist_ok=True)
+    local_root = sync_root(project_root, config)
+    local_root.mkdir(exist_ok=True)
 
-    local_files = _scan_local_files(local_root)
+    # Optional directory scope (interactive / flag-based): both sides are
+    # limited to it, so files outside it are neither listed nor scanned.
+    subtree = (download_dir or "").strip("/")
 
     # -------------------------------------------------
     # Drive scan
     # -------------------------------------------------
-    if sync_scope == "folder":
-        drive_files_raw = list_drive_files(
+    with metrics.span("plan.list_remote"):
+        drive_files, folders = list_remote(
             service,
-            config["drive_folder_id"],
+            project_root,
+            config,
+            full_relist=full_relist,
+            service_factory=service_factory,
+            ignore=ignore,
+            subtree=subtree or None,
         )
 
-        drive_files = [
-            {
-                "id": f["id"],
-                "path": f["name"],  # flat namespace
-                "md5": f["md5"],
-                "size": f["size"],
-                "mtime": f["mtime"],
-            }
-            for f in drive_files_raw
-        ]
+    # -------------------------------------------------
+    # Comparison
+    # -------------------------------------------------
+    def decisions():
+        state = load_state()
+        base = state["files"]
+        local_files = _iter_local_files(
+            local_root / subtree if subtree else local_root,
+            state["index"],
+            hash_workers=hash_workers,
+            ignore=ignore,
+            prefix=subtree,
+        )
 
-    elif sync_scope == "full_drive":
-        raw_files = list_all_drive_files(service)
-        drive_files = build_drive_paths(raw_files)
+        # Base entries of files now missing on both sides are dropped
+        scope = subtree + "/" if subtree else ""
+        gone = {
+            path for path in base
+            if path.startswith(scope)
+            and not (ignore and ignore.ignores(path))
+        }
 
-        # Optional directory filter (interactive / flag-based)
-        if download_dir:
-            prefix = download_dir.rstrip("/") + "/"
-            drive_files = [
-                f for f in drive_files
-                if f["path"] == download_dir or f["path"].startswith(prefix)
-            ]
+        for kind, entry in _merge(local_files, drive_files, base):
+            gone.discard(entry["path"] if kind == "conflicts" else entry.path)
+            yield kind, entry
 
-    else:
-        raise RuntimeError(f"Unknown sync_scope: {sync_scope}")
+        for path in gone:
+            del base[path]
+        save_state(state)
+
+    return folders, decisions()
 
-    # -------------------------------------------------
-    # Comparison
-    # -------------------------------------------------
-    local_map = {f["path"]: f for f in local_files}
-    drive_map = {f["path"]: f for f in drive_files}
 
-    uploads: List[dict] = []
-    downloads: List[dict] = []
-    unchanged: List[dict] = []
-    conflicts: List[dict] = []
+def plan_sync(
+    service,
+    project_root: Path,
+    download_dir: str | None = None,
+    hash_workers: int | None = None,
+    full_relist: bool = False,
+    service_factory=None,
+) -> Dict[str, List]:
+    """
+    Plan a sync between local filesystem and Google Drive.
 
-    # Local → upload / unchanged / conflict
-    for path, lf in local_map.items():
-        df = drive_map.get(path)
+    Returns:
+      {
+        uploads: [...],
+        downloads: [...],
+        pushes: [...],     # changed locally since the last sync
+        pulls: [...],      # changed on Drive since the last sync
+        unchanged: [...],
+        conflicts: [...],
+        folders: FolderCache
+      }
+    """
+    folders, decisions = stream_sync(
+        service,
+        project_root,
+        download_dir=download_dir,
+        hash_workers=hash_workers,
+        full_relist=full_relist,
+        service_factory=service_factory,
+    )
 
-        if not df:
-            uploads.append(lf)
-            continue
+    plan = {
+        "uploads": [],
+        "downloads": [],
+        "pushes": [],
+        "pulls": [],
+        "unchanged": [],
+        "conflicts": [],
+    }
 
-        if lf["md5"] and df["md5"] and lf["md5"] == df["md5"]:
-            unchanged.append(lf)
-        else:
-            conflicts.append(
-                {
-                    "path": path,
-                    "local": lf,
-                    "drive": df,
-                }
-            )
+    # The local walk, hashing and merge all run as decisions are drawn
+    with metrics.span("plan.scan"):
+        for kind, entry in decisions:
+            plan[kind].append(entry)
 
-    # Drive-only → download
-    for path, df in drive_map.items():
-        if path not in local_map:
-            downloads.append(df)
-
-    return {
-        "uploads": uploads,
-        "downloads": downloads,
-        "unchanged": unchanged,
-        "conflicts": conflicts,
-    }
\ No newline at end of file
+    plan["folders"] = folders
+    return plan
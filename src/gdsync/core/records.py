@@ -0,0 +1,76 @@
+import sys
+
+
+class FileRecord:
+    """
+    One file on either side of a sync, as seen by the planner, the Drive
+    listing and the executor.
+
+    Records are kept for every file in the tree, so they are slotted, the
+    parent directory string is interned (shared by every file in the same
+    directory) and the MD5 is held as 16 raw bytes instead of 32 hex chars.
+    """
+
+    __slots__ = ("parent", "name", "md5", "size", "mtime", "id")
+
+    def __init__(
+        self,
+        path: str,
+        md5: str | bytes | None = None,
+        size: int = 0,
+        mtime: float | None = None,
+        id: str | None = None,
+    ):
+        parent, _, name = path.rpartition("/")
+        self._init(parent, name, md5, size, mtime, id)
+
+    @classmethod
+    def in_dir(
+        cls,
+        parent: str,
+        name: str,
+        md5: str | bytes | None = None,
+        size: int = 0,
+        mtime: float | None = None,
+        id: str | None = None,
+    ) -> "FileRecord":
+        """
+        Build a record from its parent path and name without joining and
+        re-splitting a full path string.
+        """
+        record = cls.__new__(cls)
+        record._init(parent, name, md5, size, mtime, id)
+        return record
+
+    def _init(self, parent, name, md5, size, mtime, id):
+        self.parent = sys.intern(parent)
+        self.name = name
+        self.md5 = bytes.fromhex(md5) if isinstance(md5, str) else md5
+        self.size = size
+        self.mtime = mtime
+        self.id = id
+
+    @property
+    def path(self) -> str:
+        return f"{self.parent}/{self.name}" if self.parent else self.name
+
+    @property
+    def md5_hex(self) -> str | None:
+        return self.md5.hex() if self.md5 is not None else None
+
+    def replace(self, **changes) -> "FileRecord":
+        fields = {
+            "path": self.path,
+            "md5": self.md5,
+            "size": self.size,
+            "mtime": self.mtime,
+            "id": self.id,
+        }
+        fields.update(changes)
+        return FileRecord(**fields)
+
+    def __repr__(self) -> str:
+        return (
+            f"FileRecord(path={self.path!r}, md5={self.md5_hex!r}, "
+            f"size={self.size!r}, mtime={self.mtime!r}, id={self.id!r})"
+        )
@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+import time
+
+from gdsync.core.hashing import hash_stream
+from gdsync.core.ignore import IgnoreMatcher
+from gdsync.core.metrics import metrics
+from gdsync.core.planner import RACY_WINDOW_NS, _path_key, _walk_sorted
+from gdsync.core.records import FileRecord
+
+
+def _changes() -> Dict[str, List[str]]:
+    return {"added": [], "modified": [], "deleted": []}
+
+
+def _sorted(changes: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {
+        kind: sorted(paths, key=_path_key)
+        for kind, paths in changes.items()
+    }
+
+
+def local_changes(
+    root: Path,
+    base: Dict[str, str],
+    index: dict,
+    hash_workers: int | None = None,
+    ignore: IgnoreMatcher | None = None,
+) -> Tuple[Dict[str, List[str]], bool]:
+    """
+    Local additions, modifications and deletions since the last sync.
+
+    Files whose stat tuple still matches the hash index are judged from
+    the cached MD5 alone, so an unchanged tree costs one stat per file and
+    no reads. Only files whose stat changed are hashed, and their index
+    entries are refreshed in place (as `git status` refreshes its index).
+
+    Returns ({"added", "modified", "deleted"} -> sorted paths, whether the
+    index was changed and is worth saving).
+    """
+    changes = _changes()
+    seen = set()
+    restat = []
+    scan_start_ns = time.time_ns()
+
+    def classify(path: str, md5: str):
+        if path not in base:
+            changes["added"].append(path)
+        elif base[path] != md5:
+            changes["modified"].append(path)
+
+    if root.exists():
+        for rel_path, full_path, stat in _walk_sorted(root, ignore=ignore):
+            seen.add(rel_path)
+            key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+            cached = index.get(rel_path)
+
+            if cached and cached[:3] == key:
+                classify(rel_path, cached[3])
+            else:
+                restat.append(((rel_path, key), full_path))
+
+    for (rel_path, key), md5 in hash_stream(restat, hash_workers):
+        if scan_start_ns - key[1] > RACY_WINDOW_NS:
+            index[rel_path] = key + [md5]
+        else:
+            index.pop(rel_path, None)
+        classify(rel_path, md5)
+
+    metrics.add("files_hashed", len(restat))
+    metrics.add("bytes_hashed", sum(key[0] for (_, key), _ in restat))
+
+    stale = index.keys() - seen
+    for path in stale:
+        del index[path]
+
+    changes["deleted"] = [
+        path for path in base
+        if path not in seen and not (ignore and ignore.ignores(path))
+    ]
+    return _sorted(changes), bool(restat or stale)
+
+
+def remote_changes(
+    drive_files: Iterable[FileRecord],
+    base: Dict[str, str],
+    ignore: IgnoreMatcher | None = None,
+) -> Dict[str, List[str]]:
+    """
+    Drive-side additions, modifications and deletions since the last sync.
+    """
+    changes = _changes()
+    seen = set()
+
+    for f in drive_files:
+        if f.path in seen:
+            continue
+        seen.add(f.path)
+
+        if f.path not in base:
+            changes["added"].append(f.path)
+        elif f.md5 is not None and base[f.path] != f.md5_hex:
+            changes["modified"].append(f.path)
+
+    changes["deleted"] = [
+        path for path in base
+        if path not in seen and not (ignore and ignore.ignores(path))
+    ]
+    return _sorted(changes)
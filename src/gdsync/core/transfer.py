@@ -0,0 +1,235 @@
+from collections import deque
+from typing import Callable, List, Tuple
+import sys
+import threading
+import time
+
+from gdsync.core.records import FileRecord
+
+
+# Files at or above this size go to the "large" lane: they are started
+# largest-first on a few dedicated workers so they stream in parallel with
+# the bulk of small files instead of all piling up at the end.
+LARGE_FILE_BYTES = 32 * 1024 * 1024
+
+DEFAULT_WORKERS = 4
+
+# Resumable upload chunks must be multiples of 256 KiB. The adaptive size
+# aims for chunks that take CHUNK_TARGET_SECONDS each: large enough to keep
+# per-request overhead low on fast links, small enough that a dropped
+# connection only costs a few seconds of re-sending on slow ones.
+CHUNK_ALIGN = 256 * 1024
+MIN_CHUNK_BYTES = 4 * CHUNK_ALIGN
+MAX_CHUNK_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+CHUNK_TARGET_SECONDS = 4.0
+
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+
+def _format_size(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def _progress_bar(done: int, total: int, width: int = 30) -> str:
+    if total <= 0:
+        return "[?]"
+    ratio = min(done / total, 1.0)
+    filled = int(ratio * width)
+    bar = "#" * filled + "-" * (width - filled)
+    return f"[{bar}] {int(ratio * 100):3d}%"
+
+
+def _align(n: float) -> int:
+    return max(CHUNK_ALIGN, int(n) // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+# -------------------------------------------------
+# Chunk sizing
+# -------------------------------------------------
+
+class ChunkSizer:
+    """
+    Upload chunk size shared by all workers of one batch.
+
+    With a fixed size the chunk never changes. Otherwise every finished
+    chunk feeds a smoothed throughput estimate and the size moves towards
+    throughput * CHUNK_TARGET_SECONDS, at most doubling or halving per
+    step.
+    """
+
+    def __init__(self, fixed: int | None = None):
+        self.adaptive = fixed is None
+        self._size = _align(fixed or DEFAULT_CHUNK_BYTES)
+        self._rate: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def record(self, nbytes: int, seconds: float):
+        if not self.adaptive or nbytes <= 0 or seconds <= 0:
+            return
+
+        with self._lock:
+            rate = nbytes / seconds
+            self._rate = rate if self._rate is None else 0.7 * self._rate + 0.3 * rate
+
+            ideal = self._rate * CHUNK_TARGET_SECONDS
+            ideal = min(max(ideal, self._size / 2), self._size * 2)
+            self._size = _align(min(max(ideal, MIN_CHUNK_BYTES), MAX_CHUNK_BYTES))
+
+
+# -------------------------------------------------
+# Aggregated progress
+# -------------------------------------------------
+
+class MultiProgress:
+    """
+    One progress line for a whole batch of transfers, shared by all workers.
+    """
+
+    def __init__(self, label: str, total_files: int, total_bytes: int):
+        self.label = label
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.started = time.monotonic()
+        self._last_render = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, nbytes: int):
+        with self._lock:
+            self.done_bytes += nbytes
+            self._render()
+
+    def file_done(self):
+        with self._lock:
+            self.done_files += 1
+            self._render()
+
+    def message(self, text: str):
+        with self._lock:
+            sys.stdout.write(f"\r\033[K{text}\n")
+            self._render()
+
+    def close(self):
+        with self._lock:
+            self._render(force=True)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+
+    def _render(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_render < 0.1:
+            return
+        self._last_render = now
+
+        elapsed = max(now - self.started, 1e-6)
+        sys.stdout.write(
+            f"\r\033[K{self.label} "
+            f"{_progress_bar(self.done_bytes, self.total_bytes)} "
+            f"{_format_size(self.done_bytes)} / "
+            f"{_format_size(self.total_bytes)} | "
+            f"{self.done_files}/{self.total_files} files | "
+            f"{_format_size(self.done_bytes / elapsed)}/s"
+        )
+        sys.stdout.flush()
+
+
+# -------------------------------------------------
+# Scheduler
+# -------------------------------------------------
+
+def run_transfers(
+    jobs: List[FileRecord],
+    transfer: Callable,
+    *,
+    label: str,
+    service,
+    service_factory: Callable | None = None,
+    workers: int = DEFAULT_WORKERS,
+) -> Tuple[List[FileRecord], List[Tuple[FileRecord, Exception]]]:
+    """
+    Run transfer(service, job, progress) for every job on a worker pool.
+
+    Each worker thread gets its own Drive client from service_factory;
+    without a factory, jobs run sequentially on the given service. Small
+    files are taken smallest-first and large files largest-first on their
+    own lane, with idle workers stealing from the other lane.
+
+    Returns (completed jobs, [(failed job, exception), ...]).
+    """
+    if not jobs:
+        return [], []
+
+    progress = MultiProgress(
+        label,
+        total_files=len(jobs),
+        total_bytes=sum(j.size for j in jobs),
+    )
+
+    ordered = sorted(jobs, key=lambda j: j.size)
+    small = deque(j for j in ordered if j.size < LARGE_FILE_BYTES)
+    large = deque(reversed([j for j in ordered if j.size >= LARGE_FILE_BYTES]))
+
+    completed: List[FileRecord] = []
+    failed: List[Tuple[FileRecord, Exception]] = []
+    lock = threading.Lock()
+
+    def next_job(prefer_large: bool):
+        with lock:
+            lanes = (large, small) if prefer_large else (small, large)
+            for lane in lanes:
+                if lane:
+                    return lane.popleft()
+        return None
+
+    def worker(prefer_large: bool, svc=None):
+        if svc is None:
+            svc = service_factory()
+
+        while True:
+            job = next_job(prefer_large)
+            if job is None:
+                return
+            try:
+                transfer(svc, job, progress)
+            except Exception as e:
+                with lock:
+                    failed.append((job, e))
+                progress.message(f"  ✖ {job.path}: {e}")
+            else:
+                with lock:
+                    completed.append(job)
+            progress.file_done()
+
+    workers = min(workers, len(jobs))
+
+    if workers <= 1 or service_factory is None:
+        worker(prefer_large=False, svc=service)
+    else:
+        large_lanes = max(1, workers // 4) if large else 0
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(i < large_lanes,),
+                daemon=True,
+            )
+            for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    progress.close()
+    return completed, failed
@@ -0,0 +1,27 @@
+import json
+import os
+from pathlib import Path
+
+
+def write_json_atomic(path: Path, data, **dump_kwargs):
+    """
+    Write JSON to a temp file and rename it into place, so a crash never
+    leaves a half-written file behind.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+
+    with open(tmp, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+
+    os.replace(tmp, path)
+
+
+def read_json(path: Path, default=None):
+    """
+    Read a JSON file, returning default if it is missing or corrupt.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
@@ -0,0 +1,174 @@
+import io
+import json
+import stat
+import sys
+import types
+
+import pytest
+
+from gdsync.core import api, auth
+from gdsync.core.http import SessionHttp
+
+
+def _module(monkeypatch, name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    monkeypatch.setitem(sys.modules, name, module)
+
+
+# -----------------------------
+# Credentials
+# -----------------------------
+
+class RefreshError(Exception):
+    pass
+
+
+class _Credentials:
+    revoked = False
+
+    def __init__(self):
+        self.valid = False
+        self.refresh_token = "refresh"
+
+    @classmethod
+    def from_authorized_user_file(cls, path, scopes):
+        return cls()
+
+    def refresh(self, request):
+        if self.revoked:
+            raise RefreshError("invalid_grant")
+        self.valid = True
+
+    def to_json(self):
+        return json.dumps({"token": "fresh"})
+
+
+class _NoFlow:
+    @classmethod
+    def from_client_config(cls, *args, **kwargs):
+        raise AssertionError("the consent flow must not run")
+
+
+@pytest.fixture
+def token(tmp_path, monkeypatch):
+    for name in ("google", "google.auth", "google.auth.transport",
+                 "google.oauth2", "google_auth_oauthlib"):
+        _module(monkeypatch, name)
+    _module(monkeypatch, "google.auth.exceptions", RefreshError=RefreshError)
+    _module(monkeypatch, "google.auth.transport.requests", Request=object)
+    _module(monkeypatch, "google.oauth2.credentials", Credentials=_Credentials)
+    _module(monkeypatch, "google_auth_oauthlib.flow", InstalledAppFlow=_NoFlow)
+
+    oauth = tmp_path / "oauth.json"
+    oauth.write_text("{}")
+    path = tmp_path / "token.json"
+    path.write_text(json.dumps({"token": "expired"}))
+
+    monkeypatch.setattr(auth, "OAUTH_FILE", oauth)
+    monkeypatch.setattr(auth, "TOKEN_FILE", path)
+    monkeypatch.setattr(auth, "ensure_global_dir", lambda: None)
+    monkeypatch.setattr(sys, "stdin", io.StringIO())
+    return path
+
+
+def test_expired_token_is_refreshed_without_prompting(token):
+    # A world-readable leftover from an interrupted write
+    stale = token.with_name("token.json.tmp")
+    stale.write_text("")
+    stale.chmod(0o644)
+
+    creds = auth.load_credentials()
+
+    assert creds.valid
+    assert json.loads(token.read_text()) == {"token": "fresh"}
+    assert stat.S_IMODE(token.stat().st_mode) == 0o600
+    assert not stale.exists()
+
+
+def test_revoked_token_is_not_reauthorized_without_a_tty(
+    token, monkeypatch
+):
+    monkeypatch.setattr(_Credentials, "revoked", True)
+
+    with pytest.raises(RuntimeError, match="gdsync auth"):
+        auth.load_credentials()
+    assert json.loads(token.read_text()) == {"token": "expired"}
+
+
+# -----------------------------
+# Pooled transport
+# -----------------------------
+
+class _RequestException(IOError):
+    pass
+
+
+class _Timeout(_RequestException):
+    pass
+
+
+class _ConnectionError(_RequestException):
+    pass
+
+
+class _Session:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def request(self, method, uri, **kwargs):
+        self.calls.append((method, uri, kwargs))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def requests_stub(monkeypatch):
+    _module(
+        monkeypatch,
+        "requests",
+        exceptions=types.SimpleNamespace(
+            Timeout=_Timeout, ConnectionError=_ConnectionError
+        ),
+    )
+
+
+def test_session_http_returns_an_httplib2_shaped_response(requests_stub):
+    session = _Session(types.SimpleNamespace(
+        status_code=503,
+        reason="Service Unavailable",
+        headers={"Retry-After": "3", "Content-Type": "application/json"},
+        content=b"{}",
+    ))
+
+    resp, content = SessionHttp(session).request(
+        "https://drive", "POST", body=b"x", headers={"a": "b"}
+    )
+
+    assert content == b"{}"
+    assert resp.status == 503 and resp.reason == "Service Unavailable"
+    assert resp == {
+        "status": "503",
+        "retry-after": "3",
+        "content-type": "application/json",
+    }
+    method, uri, kwargs = session.calls[0]
+    assert (method, uri, kwargs["data"]) == ("POST", "https://drive", b"x")
+    assert kwargs["allow_redirects"] is False
+
+
+@pytest.mark.parametrize(
+    "raised, expected",
+    [
+        (_Timeout("read"), TimeoutError),
+        (_ConnectionError("reset"), ConnectionError),
+    ],
+)
+def test_session_http_maps_transport_errors(requests_stub, raised, expected):
+    with pytest.raises(expected) as info:
+        SessionHttp(_Session(raised)).request("https://drive")
+
+    assert info.value.__cause__ is raised
+    assert api.is_retryable(info.value)
@@ -0,0 +1,49 @@
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import gdsync
+
+
+# Runs in a fresh interpreter, since other tests may have loaded or stubbed
+# the Google client modules in this one.
+SCRIPT = """
+import json, sys
+from gdsync.cli import main
+
+codes = []
+for argv in (["status"], ["log"], ["--help"]):
+    try:
+        codes.append(main(argv))
+    except SystemExit as e:
+        codes.append(e.code)
+
+loaded = sorted(
+    name for name in sys.modules
+    if name.split(".")[0] in ("googleapiclient", "google", "httplib2")
+)
+print(json.dumps({"codes": codes, "loaded": loaded}))
+"""
+
+
+def test_offline_commands_do_not_import_the_google_client(tmp_path):
+    (tmp_path / ".gdsync").mkdir()
+    (tmp_path / ".gdsync" / "config.json").write_text(
+        json.dumps({"sync_scope": "folder", "drive_folder_id": "top"})
+    )
+    (tmp_path / "a.txt").write_text("a")
+    src = Path(gdsync.__file__).parents[1]
+
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(src)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    result = json.loads(out.splitlines()[-1])
+    assert result == {"codes": [0, 0, 0], "loaded": []}
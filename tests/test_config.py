@@ -0,0 +1,194 @@
+from datetime import datetime, timezone
+import json
+
+import pytest
+
+from gdsync.cli import build_parser
+from gdsync.config import state
+from gdsync.core import conflict_log, dirtree
+from gdsync.core.journal import UploadJournal
+from gdsync.core.records import FileRecord
+
+
+def test_load_state_defaults_when_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".gdsync").mkdir()
+
+    loaded = state.load_state()
+
+    assert loaded == {"last_sync": None, "files": {}, "index": {}}
+
+
+def test_record_synced_updates_base(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".gdsync").mkdir()
+    state.write_empty_state()
+
+    state.record_synced(
+        [
+            FileRecord("a/b.pdf", md5="0f" * 16),
+            FileRecord("no-md5.gdoc"),
+        ]
+    )
+
+    loaded = state.load_state()
+    assert loaded["files"] == {"a/b.pdf": "0f" * 16}
+    assert loaded["last_sync"].endswith("Z")
+
+    state.record_hashes({"c.txt": "aa" * 16})
+    assert state.load_state()["files"] == {
+        "a/b.pdf": "0f" * 16,
+        "c.txt": "aa" * 16,
+    }
+
+
+def test_upload_journal_drops_stale_sessions(tmp_path):
+    path = tmp_path / "uploads.json"
+
+    journal = UploadJournal(path)
+    journal.start("big.iso", "https://upload/1", "folder1", 100, 5)
+    journal.advance("big.iso", 40)
+
+    reloaded = UploadJournal(path)
+    assert reloaded.get("big.iso", "folder1", 100, 5)["offset"] == 40
+
+    # The local file changed since the session was opened
+    assert reloaded.get("big.iso", "folder1", 101, 6) is None
+    assert not path.exists()
+
+
+def test_dir_tree_prefetches_and_persists_listings(tmp_path, monkeypatch):
+    tree_data = {"root": ["a", "b"], "a": ["a1"], "b": [], "a1": []}
+    fetched = []
+
+    def subdirs(service, parent_id):
+        fetched.append(parent_id)
+        return [{"id": d, "name": d.upper()} for d in tree_data[parent_id]]
+
+    monkeypatch.setattr(
+        dirtree, "list_drive_directories", lambda s: subdirs(s, "root")
+    )
+    monkeypatch.setattr(dirtree, "list_drive_subdirectories", subdirs)
+    path = tmp_path / "dirs.json"
+
+    tree = dirtree.DirTree(lambda: None, path)
+    assert [d["name"] for d in tree.children("root")] == ["A", "B"]
+    tree.prefetch(["a", "b"])
+    assert [d["id"] for d in tree.children("a")] == ["a1"]
+    tree.close()
+    assert sorted(fetched) == ["a", "b", "root"]
+
+    # A later run reuses fresh listings and refetches stale ones
+    fetched.clear()
+    tree = dirtree.DirTree(lambda: None, path)
+    tree.children("root")
+    tree.close()
+    assert fetched == []
+
+    tree = dirtree.DirTree(lambda: None, path, ttl=0)
+    tree.children("root")
+    tree.close()
+    assert fetched == ["root"]
+
+
+def test_conflict_log_appends_rotates_and_queries(tmp_path, monkeypatch):
+    monkeypatch.setattr(conflict_log, "MAX_BYTES", 2000)
+    stamps = iter(f"2024-01-{day:02d}T00:00:00Z" for day in range(1, 31))
+    monkeypatch.setattr(conflict_log, "_now", lambda: next(stamps))
+    f = FileRecord("x", md5="00" * 16, size=1, mtime=0.0)
+
+    with conflict_log.ConflictLog(tmp_path) as log:
+        for i in range(30):
+            log.record(
+                path=f"dir{i % 2}/f{i}.txt",
+                local=f,
+                drive=f,
+                strategy="prefer-drive",
+                result="ok",
+            )
+
+    log = conflict_log.ConflictLog(tmp_path)
+    assert len(log.segments()) > 1
+    assert len(list(log.query())) == 30
+
+    recent = list(log.query(since="2024-01-25", until="2024-01-28"))
+    assert [e["ts"][:10] for e in recent] == [
+        "2024-01-25",
+        "2024-01-26",
+        "2024-01-27",
+    ]
+    assert {e["path"] for e in log.query(path="dir1")} == {
+        f"dir1/f{i}.txt" for i in range(1, 30, 2)
+    }
+
+    # A record torn by a crash is skipped, and the next append starts
+    # on a fresh line
+    with open(log.path, "ab") as raw:
+        raw.write(b'{"ts":"2024-02-01T00:00:00Z","pa')
+    monkeypatch.setattr(conflict_log, "_now", lambda: "2024-02-02T00:00:00Z")
+    with conflict_log.ConflictLog(tmp_path) as log:
+        log.record(
+            path="late.txt",
+            local=f,
+            drive=f,
+            strategy="skip",
+            result="skipped",
+        )
+    assert [e["path"] for e in log.query(since="2024-02")] == ["late.txt"]
+
+
+def test_log_times_are_normalised_to_utc(capsys):
+    parser = build_parser()
+
+    def since(value):
+        return parser.parse_args(["log", "--since", value]).since
+
+    assert since("2024-05-01") == "2024-05-01T00:00:00Z"
+    assert since("2024-05-01T12:30") == "2024-05-01T12:30:00Z"
+    assert since("2024-05-01T12:30:00Z") == "2024-05-01T12:30:00Z"
+    assert since("2024-05-01T14:30:00+02:00") == "2024-05-01T12:30:00Z"
+    assert parser.parse_args(["log", "-n", "3"]).limit == 3
+
+    for argv in (
+        ["log", "--since", "yesterday"],
+        ["log", "--until", "2024-13-01"],
+        ["log", "-n", "-1"],
+        ["log", "-n", "0"],
+    ):
+        with pytest.raises(SystemExit):
+            parser.parse_args(argv)
+    err = capsys.readouterr().err
+    assert "invalid time: 'yesterday'" in err
+    assert "must be at least 1" in err
+
+
+def test_conflict_log_migrates_the_old_json_log(tmp_path):
+    (tmp_path / ".gdsync").mkdir()
+    old = tmp_path / ".gdsync" / "conflicts.json"
+    side = {"size": 1, "mtime": 0.0}
+    old.write_text(json.dumps([
+        {
+            "timestamp": f"2023-12-0{day} 10:00:00",
+            "path": f"old{day}.txt",
+            "local": side,
+            "drive": side,
+            "strategy": "keep-both",
+            "result": "ok",
+        }
+        for day in (1, 2)
+    ]))
+    log = conflict_log.ConflictLog(tmp_path)
+    (tmp_path / ".gdsync" / "conflicts.jsonl").write_bytes(
+        conflict_log._encode({"ts": "2024-01-01T00:00:00Z", "path": "new.txt"})
+    )
+
+    entries = list(log.query())
+
+    # Old stamps were local time
+    utc = datetime(2023, 12, 2, 10).astimezone(timezone.utc)
+    assert [(e["ts"], e["path"]) for e in entries[1:]] == [
+        (utc.strftime("%Y-%m-%dT%H:%M:%SZ"), "old2.txt"),
+        ("2024-01-01T00:00:00Z", "new.txt"),
+    ]
+    assert entries[0]["local"] == {"size": 1, "mtime": 0.0, "md5": None}
+    assert not old.exists()
@@ -0,0 +1,424 @@
+from email.utils import formatdate
+import hashlib
+import json
+
+import pytest
+
+from fake_drive import FakeDrive, FakeRequest, FakeResponse
+from gdsync.cli import build_parser
+from gdsync.core import api, drive
+from gdsync.core.batch import execute_batch
+from gdsync.core.folders import FolderCache
+from gdsync.core.ignore import IgnoreMatcher
+
+
+class HttpError(Exception):
+    def __init__(self, status, reason="", headers=None):
+        super().__init__(f"HTTP {status} {reason}")
+        self.resp = FakeResponse(status, headers or {})
+        self.content = json.dumps(
+            {"error": {"errors": [{"reason": reason}]}}
+        ).encode()
+
+
+def _paths(files):
+    return sorted(f["name"] for f in files)
+
+
+# -----------------------------
+# Incremental full-drive listing
+# -----------------------------
+
+@pytest.fixture
+def my_drive():
+    fake = FakeDrive()
+    fake.add({"name": "a.txt"}, b"a")
+    fake.add({"name": "b.txt"}, b"b")
+    fake.add({"name": "c.txt"}, b"c")
+    return fake
+
+
+def test_incremental_listing_applies_deltas(my_drive, tmp_path):
+    snapshot = tmp_path / "drive.json"
+    first = drive.list_all_drive_files_incremental(my_drive, snapshot)
+    assert _paths(first) == ["a.txt", "b.txt", "c.txt"]
+
+    ids = {f["name"]: f["id"] for f in first}
+    my_drive.add({"name": "d.txt"}, b"d")
+    my_drive.update(ids["a.txt"], {"name": "a2.txt"}, None)
+    my_drive.update(ids["b.txt"], {"trashed": True}, None)
+    my_drive.remove(ids["c.txt"])
+    lists = my_drive.calls["files.list"]
+
+    second = drive.list_all_drive_files_incremental(my_drive, snapshot)
+
+    assert _paths(second) == ["a2.txt", "d.txt"]
+    assert my_drive.calls["files.list"] == lists
+    assert _paths(json.loads(snapshot.read_text())["files"]) == [
+        "a2.txt",
+        "d.txt",
+    ]
+
+
+def test_incremental_listing_skips_changes_without_a_file(
+    my_drive, tmp_path, monkeypatch
+):
+    snapshot = tmp_path / "drive.json"
+    drive.list_all_drive_files_incremental(my_drive, snapshot)
+
+    changes_since = my_drive.changes_since
+
+    def with_drive_change(start, page_size):
+        resp = changes_since(start, page_size)
+        resp["changes"].insert(0, {"changeType": "drive", "driveId": "d1"})
+        return resp
+
+    monkeypatch.setattr(my_drive, "changes_since", with_drive_change)
+    files = drive.list_all_drive_files_incremental(my_drive, snapshot)
+
+    assert _paths(files) == ["a.txt", "b.txt", "c.txt"]
+
+
+@pytest.mark.parametrize(
+    "status, reason",
+    [(410, ""), (404, "notFound"), (400, "invalid"), (403, "forbidden")],
+)
+def test_invalid_cursor_falls_back_to_full_relist(
+    my_drive, tmp_path, monkeypatch, status, reason
+):
+    snapshot = tmp_path / "drive.json"
+    drive.list_all_drive_files_incremental(my_drive, snapshot)
+    my_drive.add({"name": "d.txt"}, b"d")
+    lists = my_drive.calls["files.list"]
+
+    def expired(start, page_size):
+        raise HttpError(status, reason)
+
+    monkeypatch.setattr(my_drive, "changes_since", expired)
+    files = drive.list_all_drive_files_incremental(my_drive, snapshot)
+
+    assert _paths(files) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert my_drive.calls["files.list"] == lists + 1
+
+
+def test_rate_limited_changes_do_not_trigger_a_relist(
+    my_drive, tmp_path, monkeypatch
+):
+    snapshot = tmp_path / "drive.json"
+    drive.list_all_drive_files_incremental(my_drive, snapshot)
+    lists = my_drive.calls["files.list"]
+
+    def throttled(start, page_size):
+        raise HttpError(403, "userRateLimitExceeded")
+
+    monkeypatch.setattr(api, "MAX_RETRIES", 0)
+    monkeypatch.setattr(my_drive, "changes_since", throttled)
+
+    with pytest.raises(HttpError):
+        drive.list_all_drive_files_incremental(my_drive, snapshot)
+    assert my_drive.calls["files.list"] == lists
+
+
+# -----------------------------
+# Folder cache
+# -----------------------------
+
+def test_folder_cache_creates_one_batch_per_level():
+    fake = FakeDrive()
+    fake.add({"name": "a", "mimeType": drive.FOLDER_MIME}, None)
+    cache = FolderCache()
+
+    cache.ensure(fake, ["a/b/c", "a/d", "e/f"])
+
+    # Level 0 looks up a and e in one batch and creates e in another;
+    # level 1 looks up a's children (e is new) and creates b, d and f;
+    # level 2 only creates c, whose parent was created in this run.
+    assert fake.calls["batch"] == 5
+    assert fake.calls["files.list"] == 4
+    assert fake.calls["files.create"] == 5
+
+    def parent(path):
+        return fake.files_by_id[cache.get(path)]["parents"]
+
+    assert parent("a") == ["root"]
+    assert parent("a/b/c") == [cache.get("a/b")]
+    assert parent("e/f") == [cache.get("e")]
+
+
+def test_authoritative_folder_cache_skips_lookups():
+    fake = FakeDrive()
+    cache = FolderCache.from_paths({}, "root")
+
+    cache.ensure(fake, ["a/b/c", "x/y"])
+
+    assert fake.calls["files.list"] == 0
+    assert fake.calls["batch"] == 3
+    assert fake.calls["files.create"] == 5
+
+
+def test_folder_cache_dry_run_makes_no_calls():
+    fake = FakeDrive()
+    cache = FolderCache()
+
+    cache.ensure(fake, ["a/b"], dry_run=True)
+
+    assert cache.get("a/b") == "dry-run"
+    assert not fake.calls
+
+
+# -----------------------------
+# Recursive folder listing
+# -----------------------------
+
+def _folder(fid, *parents):
+    return {
+        "id": fid,
+        "name": fid,
+        "mimeType": drive.FOLDER_MIME,
+        "parents": list(parents),
+    }
+
+
+def _file(fid, name, *parents):
+    return {
+        "id": fid,
+        "name": name,
+        "md5Checksum": hashlib.md5(fid.encode()).hexdigest(),
+        "size": "1",
+        "parents": list(parents),
+    }
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_folder_tree_lists_levels_with_ored_parent_queries(
+    monkeypatch, threaded
+):
+    monkeypatch.setattr(drive, "PARENTS_PER_QUERY", 2)
+    fake = FakeDrive().load([
+        _folder("top", "root"),
+        _folder("a", "top"),
+        _folder("b", "top"),
+        _folder("c", "top"),
+        _folder("deep", "c"),
+        _folder("skip", "c"),
+        _folder("out", "root"),
+        _file("x", "x.txt", "a"),
+        _file("s", "shared.txt", "a", "b"),
+        _file("y", "y.txt", "deep"),
+        _file("z", "z.txt", "skip"),
+        _file("o", "o.txt", "out", "c"),
+        {
+            "id": "l",
+            "name": "link.txt",
+            "mimeType": drive.SHORTCUT_MIME,
+            "parents": ["b"],
+            "shortcutDetails": {"targetId": "x"},
+        },
+        {
+            "id": "l2",
+            "name": "outside.txt",
+            "mimeType": drive.SHORTCUT_MIME,
+            "parents": ["c"],
+            "shortcutDetails": {"targetId": "out"},
+        },
+    ])
+
+    files, folders = drive.list_drive_tree(
+        fake,
+        "top",
+        service_factory=(lambda: fake) if threaded else None,
+        ignore=IgnoreMatcher(["skip/"]),
+        root_path="proj",
+    )
+
+    assert sorted((f.path, f.id) for f in files) == [
+        ("proj/a/shared.txt", "s"),
+        ("proj/a/x.txt", "x"),
+        ("proj/b/link.txt", "x"),
+        ("proj/b/shared.txt", "s"),
+        ("proj/c/deep/y.txt", "y"),
+        ("proj/c/o.txt", "o"),
+    ]
+    assert all(
+        f.md5_hex == hashlib.md5(f.id.encode()).hexdigest() for f in files
+    )
+    assert folders == {
+        "proj/a": "a",
+        "proj/b": "b",
+        "proj/c": "c",
+        "proj/c/deep": "deep",
+        "proj/c/skip": "skip",
+    }
+    # top; [a, b] and [c]; [deep] -- the ignored folder is never listed
+    assert fake.calls["files.list"] == 4
+
+
+# -----------------------------
+# Request layer
+# -----------------------------
+
+@pytest.fixture
+def fresh_api(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(api, "limiter", api.TokenBucket(100.0, 100))
+    monkeypatch.setattr(api, "stats", api.ApiStats())
+    monkeypatch.setattr(api.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def _failing(*errors, result="ok"):
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return fn
+
+
+def test_retry_after_seconds_and_http_date(monkeypatch):
+    monkeypatch.setattr(api.time, "time", lambda: 1_700_000_000.0)
+
+    assert api.retry_delay(HttpError(429, headers={"retry-after": "7"}), 0) == 7
+    assert api.retry_delay(
+        HttpError(503, headers={"retry-after": "600"}), 0
+    ) == api.MAX_DELAY
+
+    when = formatdate(1_700_000_030, usegmt=True)
+    assert api.retry_delay(
+        HttpError(503, headers={"retry-after": when}), 0
+    ) == 30
+
+    monkeypatch.setattr(api.random, "uniform", lambda a, b: b)
+    assert api.retry_delay(HttpError(503), 3) == api.BASE_DELAY * 8
+
+
+def test_rate_limit_403_is_retried_but_other_403s_are_not(fresh_api):
+    rate_limited = HttpError(403, "userRateLimitExceeded")
+    forbidden = HttpError(403, "insufficientFilePermissions")
+
+    assert api.is_rate_limited(rate_limited)
+    assert not api.is_rate_limited(forbidden)
+    assert api.call(_failing(rate_limited), "files.list") == "ok"
+    assert len(fresh_api) == 1
+
+    with pytest.raises(HttpError):
+        api.call(_failing(forbidden), "files.get")
+    assert len(fresh_api) == 1
+
+
+def test_dropped_connections_are_retried(fresh_api):
+    fn = _failing(ConnectionResetError(), TimeoutError())
+
+    assert api.call(fn, "media.get") == "ok"
+    assert len(fresh_api) == 2
+
+
+class _Request:
+    def __init__(self, method_id, fn):
+        self.methodId = method_id
+        self.execute = fn
+
+
+def test_creates_are_not_resent_after_an_ambiguous_drop(fresh_api):
+    create = _Request("drive.files.create", _failing(TimeoutError()))
+    with pytest.raises(TimeoutError):
+        api.execute(create)
+
+    refused = _failing(ConnectionRefusedError())
+    assert api.execute(_Request("drive.files.create", refused)) == "ok"
+
+    update = _Request("drive.files.update", _failing(TimeoutError()))
+    assert api.execute(update) == "ok"
+    assert len(fresh_api) == 2
+
+
+def test_folder_creates_are_not_resent_after_a_drop(fresh_api, monkeypatch):
+    fake = FakeDrive()
+    new_batch = fake.new_batch_http_request
+
+    def dropping(callback=None):
+        # Drive creates the folders, then the connection drops
+        batch = new_batch(callback)
+        run = batch.execute
+
+        def execute():
+            run()
+            raise TimeoutError()
+
+        batch.execute = execute
+        return batch
+
+    monkeypatch.setattr(fake, "new_batch_http_request", dropping)
+
+    with pytest.raises(TimeoutError):
+        FolderCache.from_paths({}, "root").ensure(fake, ["a"])
+    assert fake.calls["files.create"] == 1
+    assert fresh_api == []
+
+
+def test_batch_resends_retryable_parts_and_routes_errors(fresh_api):
+    fake = FakeDrive()
+    requests = {
+        "ok": FakeRequest(fake, "files.get", _failing(result="a")),
+        "flaky": FakeRequest(
+            fake, "files.get", _failing(HttpError(503), result="b")
+        ),
+        "gone": FakeRequest(fake, "files.get", _failing(HttpError(404))),
+    }
+
+    responses, errors = execute_batch(fake, requests)
+
+    assert responses == {"ok": "a", "flaky": "b"}
+    assert list(errors) == ["gone"]
+    assert api._status(errors["gone"]) == 404
+    # The second round trip carries only the part that failed
+    assert fake.calls["batch"] == 2
+    assert fake.calls["files.get"] == 4
+    assert api.stats.summary()["batch"]["retries"] == 1
+
+
+def test_bucket_backs_off_on_rate_limits_and_recovers(fresh_api):
+    bucket = api.limiter
+
+    # Halved twice, then one success adds back 1% of the ceiling
+    api.call(_failing(HttpError(429), HttpError(429)), "files.create")
+    assert bucket.rate == 26.0
+
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate == api.MIN_QPS
+
+    for _ in range(200):
+        api.call(_failing(), "files.list")
+    assert bucket.rate == bucket.ceiling
+
+
+def test_stats_count_calls_retries_and_failures_per_endpoint(
+    fresh_api, monkeypatch
+):
+    monkeypatch.setattr(api, "MAX_RETRIES", 2)
+
+    api.call(_failing(HttpError(500)), "files.list")
+    api.call(_failing(), "files.list")
+    with pytest.raises(HttpError):
+        api.call(_failing(*[HttpError(503)] * 3), "files.create")
+    with pytest.raises(HttpError):
+        api.call(_failing(HttpError(404)), "files.get")
+
+    assert api.stats.summary() == {
+        "files.create": {"calls": 3, "retries": 2, "failures": 1},
+        "files.get": {"calls": 1, "retries": 0, "failures": 1},
+        "files.list": {"calls": 3, "retries": 1, "failures": 0},
+    }
+
+
+def test_max_qps_must_be_positive(capsys):
+    parser = build_parser()
+
+    assert parser.parse_args(["run", "--max-qps", "2.5"]).max_qps == 2.5
+    for value in ("0", "-3", "nan"):
+        with pytest.raises(SystemExit):
+            parser.parse_args(["run", "--max-qps", value])
+    assert "must be greater than 0" in capsys.readouterr().err
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+
+from gdsync.core import hashing, metrics, planner, status
+
+
+def _age(path, seconds=60):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10**9))
+
+
+def test_unchanged_tree_is_not_rehashed(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("hello")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("world")
+    _age(tmp_path / "a.txt")
+    _age(tmp_path / "sub" / "b.txt")
+
+    index = {}
+    first = planner._scan_local_files(tmp_path, index)
+    assert len(index) == 2
+
+    calls = []
+    monkeypatch.setattr(hashing, "md5_file", lambda p: calls.append(p))
+
+    second = planner._scan_local_files(tmp_path, index)
+
+    assert calls == []
+    assert sorted(f.md5 for f in first) == sorted(f.md5 for f in second)
+
+
+def test_changed_file_is_rehashed_and_stale_entries_pruned(tmp_path):
+    (tmp_path / "a.txt").write_text("hello")
+    (tmp_path / "b.txt").write_text("gone soon")
+    _age(tmp_path / "a.txt")
+    _age(tmp_path / "b.txt")
+
+    index = {}
+    planner._scan_local_files(tmp_path, index)
+    old_md5 = index["a.txt"][3]
+
+    (tmp_path / "a.txt").write_text("hello, again")
+    _age(tmp_path / "a.txt")
+    (tmp_path / "b.txt").unlink()
+
+    files = planner._scan_local_files(tmp_path, index)
+
+    assert [f.path for f in files] == ["a.txt"]
+    assert index["a.txt"][3] != old_md5
+    assert "b.txt" not in index
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    (tmp_path / "fresh.txt").write_text("just written")
+
+    index = {}
+    files = planner._scan_local_files(tmp_path, index)
+
+    assert files[0].md5
+    assert index == {}
+
+
+def test_md5_file_matches_hashlib(tmp_path, monkeypatch):
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    path = tmp_path / "blob.bin"
+    path.write_bytes(data)
+    expected = hashlib.md5(data).hexdigest()
+
+    assert hashing.md5_file(path) == expected
+
+    monkeypatch.setattr(hashing, "MMAP_THRESHOLD", 1024)
+    assert hashing.md5_file(path) == expected
+
+
+def test_parallel_scan_hashes_match_serial(tmp_path):
+    for i in range(20):
+        (tmp_path / f"f{i}.bin").write_bytes(os.urandom(1000 + i))
+
+    def scan(workers):
+        records = planner._scan_local_files(tmp_path, hash_workers=workers)
+        return [(f.path, f.md5_hex) for f in records]
+
+    assert scan(8) == scan(1)
+
+
+def test_status_reads_only_files_whose_stat_changed(tmp_path, monkeypatch):
+    for name in ("same.txt", "edited.txt", "deleted.txt"):
+        (tmp_path / name).write_text(name)
+        _age(tmp_path / name)
+
+    index = {}
+    base = {
+        f.path: f.md5_hex for f in planner._scan_local_files(tmp_path, index)
+    }
+
+    (tmp_path / "edited.txt").write_text("new content")
+    (tmp_path / "deleted.txt").unlink()
+    (tmp_path / "added.txt").write_text("added")
+
+    hashed = []
+    real_md5 = hashing.md5_file
+    monkeypatch.setattr(
+        hashing,
+        "md5_file",
+        lambda p: hashed.append(os.path.basename(p)) or real_md5(p),
+    )
+
+    changes, refreshed = status.local_changes(tmp_path, base, index)
+
+    assert changes == {
+        "added": ["added.txt"],
+        "modified": ["edited.txt"],
+        "deleted": ["deleted.txt"],
+    }
+    assert sorted(hashed) == ["added.txt", "edited.txt"]
+    assert refreshed and "deleted.txt" not in index
+
+
+def test_scan_metrics_export_as_json_and_prometheus(tmp_path):
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / "tree" / name).parent.mkdir(exist_ok=True)
+        (tmp_path / "tree" / name).write_text("12345")
+
+    before = dict(metrics.metrics.counters)
+    with metrics.metrics.span("plan.scan"):
+        planner._scan_local_files(tmp_path / "tree")
+    metrics.write_metrics(tmp_path / "run")
+
+    data = json.loads((tmp_path / "run.json").read_text())
+    counters = data["counters"]
+    assert counters["files_scanned"] - before.get("files_scanned", 0) == 2
+    assert counters["bytes_hashed"] - before.get("bytes_hashed", 0) == 10
+
+    # Hashing outside the scan (download verification) is not counted
+    hashing.md5_file(tmp_path / "tree" / "a.txt")
+    assert metrics.metrics.counters["bytes_hashed"] == counters["bytes_hashed"]
+    assert "files_scanned_per_second" in data["rates"]
+
+    prom = (tmp_path / "run.prom").read_text()
+    assert "# TYPE gdsync_phase_seconds gauge" in prom
+    assert 'gdsync_phase_seconds{phase="plan.scan"}' in prom
+    assert f"gdsync_files_scanned {counters['files_scanned']}" in prom
+    assert "gdsync_last_run_success 1" in prom
@@ -0,0 +1,279 @@
+import hashlib
+import json
+
+import pytest
+
+from fake_drive import FakeDrive
+from gdsync.config import state
+from gdsync.core import planner
+from gdsync.core.drive import (
+    FOLDER_MIME,
+    SHORTCUT_MIME,
+    resolve_drive_paths,
+)
+from gdsync.core.ignore import IgnoreMatcher
+from gdsync.core.records import FileRecord
+
+
+def _local(path, md5="aa"):
+    return FileRecord(path, md5=md5, size=1, mtime=0.0)
+
+
+def _drive(path, md5="aa", file_id=None):
+    return FileRecord(path, md5=md5, size=1, mtime=0.0, id=file_id or path)
+
+
+def _kinds(decisions):
+    return [
+        (kind, e["path"] if kind == "conflicts" else e.path)
+        for kind, e in decisions
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_order_matches_path_key(tmp_path, workers):
+    tree = ["a.txt", "a/x.txt", "a/b/y.txt", "a/c/z.txt", "a-b.txt", "b.txt"]
+    for rel in tree:
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+    (tmp_path / ".gdsync").mkdir()
+    (tmp_path / ".gdsync" / "state.json").write_text("{}")
+
+    walk = planner._walk_sorted(tmp_path, workers=workers)
+    paths = [rel for rel, _, _ in walk]
+
+    assert paths == sorted(paths, key=planner._path_key)
+    assert ".gdsync/state.json" not in paths
+    assert len(paths) == 6
+
+
+def test_walk_prefetches_a_bounded_window(tmp_path, monkeypatch):
+    for i in range(50):
+        (tmp_path / f"d{i:02}").mkdir()
+        (tmp_path / f"d{i:02}" / "f.txt").write_text("f")
+    submitted = []
+
+    class Pool(planner.ThreadPoolExecutor):
+        def submit(self, fn, full_path, *args):
+            submitted.append(full_path)
+            return super().submit(fn, full_path, *args)
+
+    monkeypatch.setattr(planner, "ThreadPoolExecutor", Pool)
+    monkeypatch.setattr(planner, "PREFETCH_PER_WORKER", 2)
+    walk = planner._walk_sorted(tmp_path, workers=2)
+
+    assert next(walk)[0] == "d00/f.txt"
+    # Four listed ahead; taking d00 off the window made room for d04
+    assert len(submitted) == 5
+    assert len(list(walk)) == 49
+    assert len(submitted) == 50
+
+
+def test_ignore_rules_follow_gitignore_semantics():
+    ignore = IgnoreMatcher(
+        [
+            "# comment",
+            "node_modules/",
+            "*.log",
+            "!keep.log",
+            "/build",
+            "docs/**/*.tmp",
+        ]
+    )
+
+    assert ignore.match("web/node_modules", is_dir=True)
+    assert not ignore.match("node_modules")  # directories only
+    assert ignore.match("a/b/debug.log")
+    assert not ignore.match("a/keep.log")
+    assert ignore.match("build", is_dir=True)
+    assert not ignore.match("src/build", is_dir=True)
+    assert ignore.match("docs/x/y/z.tmp")
+    assert ignore.ignores("web/node_modules/lib/index.js")
+    assert not ignore.ignores("web/src/index.js")
+
+
+def test_walk_prunes_ignored_directories(tmp_path, monkeypatch):
+    for rel in ["src/a.py", "node_modules/m/index.js", "debug.log"]:
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+
+    opened = []
+    real_scandir = planner.os.scandir
+    monkeypatch.setattr(
+        planner.os,
+        "scandir",
+        lambda p: opened.append(str(p)) or real_scandir(p),
+    )
+
+    ignore = IgnoreMatcher(["node_modules/", "*.log"])
+    paths = [rel for rel, _, _ in planner._walk_sorted(tmp_path, ignore=ignore)]
+
+    assert paths == ["src/a.py"]
+    assert not any("node_modules" in p for p in opened)
+
+
+def test_subtree_scan_keeps_paths_and_index_outside_it(tmp_path):
+    for rel in ["course/a.txt", "course/w/b.txt", "other/c.txt"]:
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(rel)
+
+    index = {
+        "other/c.txt": [1, 0, 0, "aa"],
+        "course/gone.txt": [1, 0, 0, "aa"],
+    }
+    records = planner._scan_local_files(
+        tmp_path / "course", index, prefix="course"
+    )
+
+    assert [r.path for r in records] == ["course/a.txt", "course/w/b.txt"]
+    assert "other/c.txt" in index
+    assert "course/gone.txt" not in index
+
+
+def test_drive_paths_resolve_deep_multi_parent_trees():
+    def folder(fid, name, *parents):
+        return {
+            "id": fid,
+            "name": name,
+            "mimeType": FOLDER_MIME,
+            "parents": list(parents),
+        }
+
+    # Far deeper than the recursion limit
+    raw = [folder("d0", "d0", "root")]
+    raw += [folder(f"d{i}", "d", f"d{i - 1}") for i in range(1, 5000)]
+    raw += [
+        {"id": "f", "name": "f.txt", "parents": ["d0", "d1"]},
+        {
+            "id": "s",
+            "name": "link.txt",
+            "mimeType": SHORTCUT_MIME,
+            "parents": ["root"],
+            "shortcutDetails": {"targetId": "f"},
+        },
+        # A folder with several parents, one of which closes a cycle
+        folder("m", "m", "d0", "root", "c"),
+        folder("c", "c", "m"),
+        {"id": "g", "name": "g.txt", "parents": ["c"]},
+    ]
+
+    records, folders = resolve_drive_paths(raw)
+
+    assert sorted(r.path for r in records) == [
+        "d0/d/f.txt",
+        "d0/f.txt",
+        "d0/m/c/g.txt",
+        "link.txt",
+        "m/c/g.txt",
+    ]
+    assert {r.id for r in records} == {"f", "g"}
+    assert folders["d0" + "/d" * 4999] == "d4999"
+
+
+def test_merge_classifies_paths():
+    local = [_local("a/x.txt"), _local("b.txt", md5="01"), _local("c.txt")]
+    drive = [_drive("c.txt"), _drive("b.txt", md5="02"), _drive("a.txt")]
+
+    decisions = planner._merge(
+        sorted(local, key=lambda f: planner._path_key(f.path)),
+        drive,
+    )
+
+    assert _kinds(decisions) == [
+        ("uploads", "a/x.txt"),
+        ("downloads", "a.txt"),
+        ("conflicts", "b.txt"),
+        ("unchanged", "c.txt"),
+    ]
+
+
+def test_merge_uses_first_of_duplicate_drive_paths():
+    drive = [_drive("a.txt", file_id="1"), _drive("a.txt", file_id="2")]
+
+    decisions = list(planner._merge([], drive))
+
+    assert [e.id for _, e in decisions] == ["1"]
+
+
+def test_file_record_round_trips_path_and_md5():
+    record = FileRecord("a/b/c.pdf", md5="00" * 16, size=3)
+
+    assert record.path == "a/b/c.pdf"
+    assert record.parent == "a/b"
+    assert record.md5 == bytes(16)
+    assert record.md5_hex == "00" * 16
+    assert record.replace(path="d.pdf").path == "d.pdf"
+    assert FileRecord("top.txt").parent == ""
+
+
+def test_three_way_merge_uses_base():
+    base = {
+        "pushed.txt": "aa",
+        "pulled.txt": "aa",
+        "both.txt": "aa",
+    }
+    local = [
+        _local("both.txt", md5="01"),
+        _local("new-conflict.txt", md5="01"),
+        _local("pulled.txt", md5="aa"),
+        _local("pushed.txt", md5="01"),
+    ]
+    drive = [
+        _drive("both.txt", md5="02"),
+        _drive("new-conflict.txt", md5="02"),
+        _drive("pulled.txt", md5="02"),
+        _drive("pushed.txt", md5="aa", file_id="remote-id"),
+    ]
+
+    decisions = list(planner._merge(local, drive, base))
+
+    assert _kinds(decisions) == [
+        ("conflicts", "both.txt"),
+        ("conflicts", "new-conflict.txt"),
+        ("pulls", "pulled.txt"),
+        ("pushes", "pushed.txt"),
+    ]
+    assert decisions[2][1].md5_hex == "02"
+    assert decisions[3][1].id == "remote-id"
+
+
+def test_deleted_locally_is_restored_and_gone_files_leave_the_base(
+    tmp_path, monkeypatch
+):
+    def md5(data):
+        return hashlib.md5(data).hexdigest()
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".gdsync").mkdir()
+    (tmp_path / ".gdsync" / "config.json").write_text(
+        json.dumps({"sync_scope": "folder", "drive_folder_id": "top"})
+    )
+    (tmp_path / "kept.txt").write_bytes(b"kept")
+    state.save_state({
+        "last_sync": None,
+        "index": {},
+        "files": {
+            "kept.txt": md5(b"kept"),
+            "deleted-locally.txt": md5(b"x"),
+            "deleted-on-both.txt": md5(b"y"),
+        },
+    })
+
+    fake = FakeDrive().load([
+        {"id": "k", "name": "kept.txt", "parents": ["top"],
+         "md5Checksum": md5(b"kept"), "size": "4"},
+        {"id": "d", "name": "deleted-locally.txt", "parents": ["top"],
+         "md5Checksum": md5(b"x"), "size": "1"},
+    ])
+
+    plan = planner.plan_sync(fake, tmp_path)
+
+    assert [f.path for f in plan["downloads"]] == ["deleted-locally.txt"]
+    assert [f.path for f in plan["unchanged"]] == ["kept.txt"]
+    assert sorted(state.load_state()["files"]) == [
+        "deleted-locally.txt",
+        "kept.txt",
+    ]
@@ -0,0 +1,403 @@
+import json
+import sys
+import threading
+import types
+
+import pytest
+
+from fake_drive import FakeDrive
+from gdsync.cli import build_parser
+from gdsync.core import executor, transfer
+from gdsync.core.drive import FOLDER_MIME
+from gdsync.core.folders import FolderCache
+from gdsync.core.records import FileRecord
+
+
+def _jobs(*sizes):
+    return [FileRecord(f"f{i}.bin", size=s) for i, s in enumerate(sizes)]
+
+
+def test_lanes_run_small_ascending_then_large_descending(monkeypatch):
+    monkeypatch.setattr(transfer, "LARGE_FILE_BYTES", 100)
+    seen = []
+
+    completed, failed = transfer.run_transfers(
+        _jobs(5, 300, 1, 150, 50, 200),
+        lambda svc, job, progress: seen.append(job.size),
+        label="↓",
+        service=object(),
+    )
+
+    assert seen == [1, 5, 50, 300, 200, 150]
+    assert len(completed) == 6 and failed == []
+
+
+def test_idle_workers_steal_from_the_large_lane(monkeypatch):
+    monkeypatch.setattr(transfer, "LARGE_FILE_BYTES", 100)
+    # Only the first of two workers prefers the large lane, so both jobs
+    # can only get past the barrier together if the other one steals.
+    barrier = threading.Barrier(2, timeout=5)
+    threads = set()
+
+    def run(svc, job, progress):
+        threads.add(threading.get_ident())
+        barrier.wait()
+
+    completed, failed = transfer.run_transfers(
+        _jobs(200, 300),
+        run,
+        label="↓",
+        service=None,
+        service_factory=object,
+        workers=2,
+    )
+
+    assert failed == []
+    assert len(completed) == 2 and len(threads) == 2
+
+
+def test_failures_are_collected_without_aborting(capsys):
+    def run(svc, job, progress):
+        if job.path == "f1.bin":
+            raise IOError("boom")
+
+    completed, failed = transfer.run_transfers(
+        _jobs(1, 2, 3),
+        run,
+        label="↑",
+        service=object(),
+    )
+
+    assert [j.path for j in completed] == ["f0.bin", "f2.bin"]
+    assert [(j.path, str(e)) for j, e in failed] == [("f1.bin", "boom")]
+    assert "✖ f1.bin: boom" in capsys.readouterr().out
+
+
+def test_each_worker_builds_its_own_client():
+    clients = []
+    used = {}
+    lock = threading.Lock()
+
+    def factory():
+        svc = object()
+        with lock:
+            clients.append(svc)
+        return svc
+
+    def run(svc, job, progress):
+        with lock:
+            used.setdefault(threading.get_ident(), set()).add(id(svc))
+
+    shared = object()
+    transfer.run_transfers(
+        _jobs(*range(1, 41)),
+        run,
+        label="↓",
+        service=shared,
+        service_factory=factory,
+        workers=4,
+    )
+
+    assert len(clients) == 4
+    assert all(len(ids) == 1 for ids in used.values())
+    assert id(shared) not in set().union(*used.values())
+
+
+def test_progress_redraws_are_throttled(capsys):
+    transfer.run_transfers(
+        _jobs(*[1] * 500),
+        lambda svc, job, progress: progress.advance(job.size),
+        label="↓",
+        service=object(),
+    )
+
+    # One throttled redraw at the start and the forced one at the end
+    assert capsys.readouterr().out.count("\r\033[K") < 10
+
+
+# -------------------------------------------------
+# Downloads
+# -------------------------------------------------
+
+class _Progress:
+    def __init__(self):
+        self.bytes = 0
+
+    def advance(self, nbytes):
+        self.bytes += nbytes
+
+
+DATA = bytes(range(256)) * 12  # 3072 bytes, three 1 KiB chunks
+
+
+def _remote(data=DATA, path="dir/blob.bin"):
+    fake = FakeDrive()
+    meta = fake.add({"name": "blob.bin"}, data)
+    record = FileRecord(
+        path, md5=meta["md5Checksum"], size=len(data), id=meta["id"]
+    )
+    return fake, record
+
+
+def _download(fake, record, tmp_path):
+    partial = tmp_path / "partial"
+    partial.mkdir(exist_ok=True)
+    progress = _Progress()
+    executor._download_one(
+        fake,
+        record,
+        tmp_path / record.path,
+        progress,
+        partial_dir=partial,
+        chunk_size=1024,
+        connections=1,
+        service_factory=None,
+    )
+    return partial, progress
+
+
+def _journal(tmp_path, record, ranges, md5=None):
+    partial = tmp_path / "partial"
+    partial.mkdir()
+    name = executor._partial_name(record)
+    with open(partial / f"{name}.part", "wb") as fh:
+        fh.write(DATA[:1024])
+        fh.truncate(len(DATA))
+    (partial / f"{name}.json").write_text(json.dumps({
+        "md5": md5 or record.md5_hex,
+        "size": record.size,
+        "ranges": ranges,
+    }))
+
+
+def test_download_resumes_journaled_ranges_without_a_factory(tmp_path):
+    fake, record = _remote()
+    # Two ranges from an earlier parallel run; the first is done
+    _journal(tmp_path, record, [[0, 1023, 1024], [1024, 3071, 1024]])
+
+    partial, progress = _download(fake, record, tmp_path)
+
+    assert (tmp_path / record.path).read_bytes() == DATA
+    assert fake.calls["media.get"] == 2
+    assert progress.bytes == len(DATA)
+    assert list(partial.iterdir()) == []
+
+
+def test_download_discards_a_stale_journal(tmp_path):
+    fake, record = _remote()
+    _journal(tmp_path, record, [[0, 3071, 2048]], md5="00" * 16)
+
+    _download(fake, record, tmp_path)
+
+    assert (tmp_path / record.path).read_bytes() == DATA
+    assert fake.calls["media.get"] == 3
+
+
+def test_download_rejects_an_md5_mismatch(tmp_path):
+    fake, record = _remote()
+    record.md5 = bytes(16)
+
+    with pytest.raises(IOError, match="MD5 mismatch"):
+        _download(fake, record, tmp_path)
+
+    assert not (tmp_path / record.path).exists()
+    assert list((tmp_path / "partial").iterdir()) == []
+
+
+def test_download_needs_at_least_one_connection(tmp_path):
+    fake, record = _remote()
+
+    with pytest.raises(ValueError, match="at least 1"):
+        executor._download_one(
+            fake,
+            record,
+            tmp_path / record.path,
+            _Progress(),
+            partial_dir=tmp_path,
+            chunk_size=1024,
+            connections=0,
+            service_factory=None,
+        )
+    assert not fake.calls
+
+
+def test_one_drive_file_downloads_to_several_paths_at_once(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".gdsync").mkdir()
+    (tmp_path / ".gdsync" / "config.json").write_text(
+        json.dumps({"sync_scope": "folder", "drive_folder_id": "top"})
+    )
+    fake, record = _remote()
+    fake.latency = 0.005
+    jobs = [record.replace(path=p) for p in ("a/blob.bin", "b/blob.bin")]
+
+    completed = executor.download_files(
+        fake,
+        jobs,
+        tmp_path,
+        workers=2,
+        service_factory=lambda: fake,
+        chunk_size=1024,
+    )
+
+    assert len(completed) == 2
+    assert (tmp_path / "a" / "blob.bin").read_bytes() == DATA
+    assert (tmp_path / "b" / "blob.bin").read_bytes() == DATA
+
+
+@pytest.mark.parametrize(
+    "flag, dest",
+    [
+        ("--chunk-size", "chunk_size"),
+        ("--download-connections", "download_connections"),
+    ],
+)
+def test_transfer_sizes_must_be_positive(capsys, flag, dest):
+    parser = build_parser()
+
+    assert getattr(parser.parse_args(["run", flag, "4"]), dest) == 4
+    for value in ("0", "-1", "1.5"):
+        with pytest.raises(SystemExit):
+            parser.parse_args(["run", flag, value])
+    assert "must be at least 1" in capsys.readouterr().err
+
+
+# -------------------------------------------------
+# Uploads
+# -------------------------------------------------
+
+class _Media:
+    """
+    Just enough of googleapiclient.http.MediaFileUpload for FakeDrive.
+    """
+
+    def __init__(self, filename, chunksize=-1, resumable=False):
+        with open(filename, "rb") as fh:
+            self._data = fh.read()
+        self._chunksize = chunksize
+
+    def size(self):
+        return len(self._data)
+
+    def chunksize(self):
+        return self._chunksize
+
+    def getbytes(self, begin, length):
+        return self._data[begin:begin + length]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    http = types.ModuleType("googleapiclient.http")
+    http.MediaFileUpload = _Media
+    client = types.ModuleType("googleapiclient")
+    client.http = http
+    monkeypatch.setitem(sys.modules, "googleapiclient", client)
+    monkeypatch.setitem(sys.modules, "googleapiclient.http", http)
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".gdsync").mkdir()
+    (tmp_path / ".gdsync" / "config.json").write_text(
+        json.dumps({"sync_scope": "folder", "drive_folder_id": "root"})
+    )
+    return tmp_path
+
+
+def test_pushes_and_prefer_local_update_the_existing_file(project):
+    fake = FakeDrive()
+    docs = fake.add({"name": "docs", "mimeType": FOLDER_MIME}, None)
+    pushed = fake.add({"name": "a.txt", "parents": [docs["id"]]}, b"old")
+    kept = fake.add({"name": "b.txt", "parents": [docs["id"]]}, b"old")
+    (project / "docs").mkdir()
+    (project / "docs" / "a.txt").write_bytes(b"new a")
+    (project / "docs" / "b.txt").write_bytes(b"new b")
+    fake.calls.clear()
+
+    executor.upload_files(
+        fake,
+        [FileRecord("docs/a.txt", size=5, id=pushed["id"])],
+        project,
+        overwrite=True,
+        folders=FolderCache(),
+    )
+    executor.resolve_conflicts(
+        fake,
+        [{
+            "path": "docs/b.txt",
+            "local": FileRecord("docs/b.txt", size=5, mtime=1.0),
+            "drive": FileRecord(
+                "docs/b.txt", size=3, mtime=1.0, id=kept["id"]
+            ),
+        }],
+        strategy="prefer-local",
+        project_root=project,
+        folders=FolderCache(),
+    )
+
+    # New revisions of the same two files: no folder lookups or creates
+    assert dict(fake.calls) == {"media.upload": 2}
+    assert fake.content[pushed["id"]] == b"new a"
+    assert fake.content[kept["id"]] == b"new b"
+    assert fake.children[docs["id"]] == [pushed["id"], kept["id"]]
+
+
+def test_keep_both_renames_and_swaps_copies(project, capsys):
+    fake = FakeDrive()
+    docs = fake.add({"name": "docs", "mimeType": FOLDER_MIME}, None)
+    conflicts = []
+    for name in ("a.txt", "b.txt"):
+        meta = fake.add({"name": name, "parents": [docs["id"]]}, b"drive")
+        conflicts.append({
+            "path": f"docs/{name}",
+            "local": FileRecord(f"docs/{name}", size=5, mtime=1.0),
+            "drive": FileRecord(
+                f"docs/{name}",
+                md5=meta["md5Checksum"],
+                size=5,
+                mtime=1.0,
+                id=meta["id"],
+            ),
+        })
+    (project / "docs").mkdir()
+    (project / "docs" / "a.txt").write_bytes(b"local")
+    (project / "docs" / "b.txt").write_bytes(b"local")
+    (project / "docs" / "b (local copy).txt").write_bytes(b"older")
+
+    synced = executor.resolve_conflicts(
+        fake,
+        conflicts,
+        strategy="keep-both",
+        project_root=project,
+        folders=FolderCache(),
+    )
+
+    drive_side = {
+        fake.files_by_id[i]["name"]: fake.content[i]
+        for i in fake.children[docs["id"]]
+    }
+    assert drive_side == {
+        "a (drive copy).txt": b"drive",
+        "b (drive copy).txt": b"drive",
+        "a (local copy).txt": b"local",
+    }
+    local_side = {
+        p.name: p.read_bytes() for p in (project / "docs").iterdir()
+    }
+    assert local_side == {
+        "a (drive copy).txt": b"drive",
+        "a (local copy).txt": b"local",
+        "b (drive copy).txt": b"drive",
+        # b's local copy already existed, so b.txt stays where it is
+        "b (local copy).txt": b"older",
+        "b.txt": b"local",
+    }
+    assert sorted(f.path for f in synced) == [
+        "docs/a (drive copy).txt",
+        "docs/a (local copy).txt",
+        "docs/b (drive copy).txt",
+    ]
+    assert "Not overwriting existing file: docs/b (local copy).txt" in (
+        capsys.readouterr().out
+    )